@@ -11,8 +11,8 @@ import os
 
 # 데이터 로딩 및 DB 관리 함수
 from batch.utils.db_manager import (
-    load_users, load_contents, save_results,
-    get_mongo_db, get_os_client, get_oracle_pool,
+    load_users, load_contents, save_results, frame_to_records,
+    connect_mongo, connect_opensearch, connect_oracle,
     close_mongo, close_opensearch, close_oracle,
     MongoDBError, OpenSearchError, DataIntegrityError
 )
@@ -22,9 +22,13 @@ from batch.utils.config_loader import MAX_CANDIDATES_PER_USER, CF_WEIGHT
 # 파이프라인 함수
 from batch.pipeline.global_candidate import compute_global_candidates
 from batch.pipeline.final_candidate import generate_candidate_for_user
+from batch.rules.global_rules import GLOBAL_RULE_REGISTRY
+from batch.rules.local_rules import select_market_content_ids
 # 데이터 로더 및 CF 유틸
 from batch.utils.data_loader import (
     load_user_interactions,
+    fetch_user_portfolios_bulk,
+    close_portfolio_session,
     APIConnectionError,
     DataValidationError,
 )
@@ -65,6 +69,7 @@ def cleanup_resources():
         close_mongo()
         close_opensearch() 
         close_oracle()
+        close_portfolio_session()
         logger.info("Resource cleanup completed.")
     except Exception as e:
         logger.error(f"Error during resource cleanup: {e}")
@@ -114,11 +119,12 @@ def main():
         # --- DB 연결 ---
         logger.info("Establishing database connections...")
         try:
-            db = get_mongo_db()
-            os_client = get_os_client()
-            oracle_pool = get_oracle_pool()
+            # connect_* 는 프로세스 단위로 캐시된 클라이언트/풀을 재사용 (이미 연결된 경우 재연결 없음)
+            db = connect_mongo()
+            os_client = connect_opensearch()
+            oracle_pool = connect_oracle()
             logger.info("All database connections established successfully.")
-        except (MongoDBError, OpenSearchError) as e:
+        except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise BatchProcessError(f"Failed to establish database connections: {e}")
 
@@ -135,7 +141,7 @@ def main():
         logger.info("Computing base data to Pandas...")
         try:
             users_pd = users_ddf.compute()
-            contents_list = contents_ddf.compute().to_dict('records')
+            contents_list = frame_to_records(contents_ddf.compute())
             
             if users_pd.empty:
                 raise BatchProcessError("No users found in database")
@@ -156,12 +162,14 @@ def main():
             base_context: Dict[str, Any] = {
                 'contents_list': contents_list,
                 'content_meta_map': {c.get('_id', c.get('id')): c for c in contents_list},
+                'market_content_ids': select_market_content_ids(contents_list),
                 'mongo_db': db,
                 'os_client': os_client,
                 'oracle_pool': oracle_pool,
                 'max_candidates_per_user': MAX_CANDIDATES_PER_USER,
                 'cf_weight': CF_WEIGHT,
                 'source_weight': 1.0,
+                'batch_timestamp': datetime.now(),  # 모든 결과 문서가 공유하는 생성/수정 시각
             }
             logger.info("Base context created successfully.")
         except Exception as e:
@@ -181,6 +189,14 @@ def main():
         base_context['user_interactions'] = user_interactions
         base_context['item_similarity_matrix'] = item_similarity_matrix
 
+        # --- 사용자 포트폴리오 일괄 조회 (로컬 룰에서 사용자별 API 호출을 대신함) ---
+        try:
+            base_context['portfolios'] = fetch_user_portfolios_bulk(
+                users_pd['cust_no'].astype(str).tolist()
+            )
+        except Exception as e:
+            logger.warning(f"Failed to prefetch user portfolios, falling back to per-user fetch: {e}")
+
         # --- 글로벌 후보 생성 ---
         logger.info("Generating global candidates...")
         try:
@@ -195,8 +211,7 @@ def main():
         # --- 기타 후보 생성 ---
         logger.info("Generating other candidates...")
         try:
-            from batch.rules.global_rules import GlobalTopLikedContentRule
-            other_rule = GlobalTopLikedContentRule()
+            other_rule = GLOBAL_RULE_REGISTRY["global_top_liked_content"]
             other_candidates = other_rule.apply(base_context)
             logger.info(f"Generated {len(other_candidates)} other candidates")
         except Exception as e:
@@ -209,8 +224,8 @@ def main():
         logger.info(f"Generating final candidates and scores for {len(users_pd)} users...")
         try:
             delayed_results = []
-            for _, user_row in users_pd.iterrows():
-                user_dict = user_row.to_dict()
+            # pyarrow 문자열 컬럼의 결측값(pd.NA)이 룰의 truthiness 검사로 넘어가지 않도록 None 으로 변환된 레코드 사용
+            for user_dict in frame_to_records(users_pd):
                 delayed_result = delayed(generate_candidate_for_user)(
                     user_dict, global_candidates, other_candidates, base_context
                 )
@@ -234,7 +249,10 @@ def main():
         logger.info("Saving final results...")
         if final_results_to_save:
             try:
-                save_success = save_results(final_results_to_save, db, collection_name="user_candidate")
+                save_success = save_results(
+                    final_results_to_save, db, collection_name="user_candidate",
+                    timestamp=base_context['batch_timestamp'],
+                )
                 if save_success:
                     success = True
                     logger.info("Results saved successfully to MongoDB")
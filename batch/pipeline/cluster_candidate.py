@@ -3,8 +3,10 @@ from dask import delayed, compute
 import pandas as pd
 from typing import List, Dict, Any, Set, Tuple # Tuple 추가
 
-# --- 규칙 클래스 직접 임포트 ---
-from batch.rules.cluster_rules import ClusterInterestRule
+from batch.utils.db_manager import frame_to_records
+
+# --- 규칙 레지스트리 임포트 (등록 시 생성된 규칙 인스턴스를 클러스터 간에 재사용) ---
+from batch.rules.cluster_rules import CLUSTER_RULE_REGISTRY
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +54,7 @@ def compute_candidates_for_single_cluster(
 
     # --- 2. 병렬 실행 규칙 (클러스터 레벨) ---
     parallel_rules = [
-        ClusterInterestRule(),
+        CLUSTER_RULE_REGISTRY["cluster_interest"],
         # 다른 병렬 실행 가능 클러스터 규칙 추가
     ]
 
@@ -99,7 +101,8 @@ def compute_cluster_candidates(users_pd: pd.DataFrame, base_context: Dict[str, A
 
     logger.info(f"Processing {len(grouped)} clusters in parallel using dask.delayed...")
     for cluster_id, group in grouped:
-        cluster_users = [row.to_dict() for _, row in group.iterrows()]
+        # 결측값(pd.NA)을 None 으로 변환한 레코드 사용 (룰의 truthiness 검사에서 TypeError 방지)
+        cluster_users = frame_to_records(group)
         # 각 클러스터별 후보 생성 함수에 base_context 전달
         delayed_result = delayed(compute_candidates_for_single_cluster)(
             cluster_id, cluster_users, base_context
@@ -2,7 +2,7 @@
 import logging
 from typing import Dict, List, Any, Set, Tuple
 from collections import defaultdict
-import pandas as pd  # Timestamp 사용
+from datetime import datetime
 
 # 로컬 후보 생성 함수
 from batch.pipeline.local_candidate import compute_local_candidates
@@ -130,11 +130,13 @@ def generate_candidate_for_user(
     # 점수 내림차순으로 정렬
     curation_list.sort(key=lambda x: x["score"], reverse=True)
 
+    # 배치 단위로 한 번 계산된 시각을 재사용 (없으면 사용자별로 한 번만 계산)
+    timestamp = context.get('batch_timestamp') or datetime.now()
     result_doc = {
         'cust_no': user.get('cust_no'),
         'curation_list': curation_list,
-        'create_dt': pd.Timestamp.now(),
-        'modi_dt': pd.Timestamp.now()
+        'create_dt': timestamp,
+        'modi_dt': timestamp
     }
 
     logger.info(f"{log_prefix} Generated final document with {len(curation_list)} scored candidates.")
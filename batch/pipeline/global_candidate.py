@@ -8,8 +8,8 @@ from batch.utils.db_manager import get_mongo_db, get_os_client, get_oracle_pool
 # 공통 데이터 로딩 함수 (필요시 정의)
 # from batch.utils.data_loader import fetch_latest_stock_data # 예시
 
-# --- 규칙 클래스 직접 임포트 ---
-from batch.rules.global_rules import GlobalStockTopReturnRule
+# --- 규칙 레지스트리 임포트 (등록 시 생성된 규칙 인스턴스를 재사용) ---
+from batch.rules.global_rules import GLOBAL_RULE_REGISTRY
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +49,7 @@ def compute_global_candidates(context: Dict[str, Any]) -> List[str]:
 
     # --- 2. 병렬 실행 규칙 ---
     parallel_rules = [
-        GlobalStockTopReturnRule(),
+        GLOBAL_RULE_REGISTRY["global_stock_top_return"],
     ]
 
     if not parallel_rules:
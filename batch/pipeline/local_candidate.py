@@ -3,11 +3,9 @@ import logging
 from dask import delayed, compute
 from typing import List, Dict, Any, Set
 
-# --- 규칙 클래스 직접 임포트 ---
-from batch.rules.local_rules import (
-    LocalMarketContentRule, LocalOwnedStockContentRule, LocalSectorContentRule
-)
-from batch.utils.data_loader import fetch_user_portfolio
+# --- 규칙 레지스트리 임포트 (등록 시 생성된 규칙 인스턴스를 사용자 간에 재사용) ---
+from batch.rules.local_rules import LOCAL_RULE_REGISTRY
+from batch.utils.data_loader import fetch_user_portfolio_cached
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +17,12 @@ def compute_local_candidates(user: Dict[str, Any], context: Dict[str, Any]) -> L
     all_candidates: Set[str] = set()
 
     # --- 사용자 포트폴리오 사전 로딩 ---
+    # 배치에서 일괄 조회한 결과(context['portfolios'])를 우선 사용하고, 없을 때만 사용자별로 조회
     portfolio_data = context.get('portfolio_data')
     if portfolio_data is None:
-        portfolio_data = fetch_user_portfolio(user_id)
+        portfolio_data = context.get('portfolios', {}).get(str(user_id))
+    if portfolio_data is None:
+        portfolio_data = fetch_user_portfolio_cached(user_id)
     user_context = dict(context)
     user_context['portfolio_data'] = portfolio_data
 
@@ -52,9 +53,9 @@ def compute_local_candidates(user: Dict[str, Any], context: Dict[str, Any]) -> L
 
     # --- 2. 병렬 실행이 가능한 규칙들 ---
     parallel_rules = [
-        LocalMarketContentRule(),
-        LocalOwnedStockContentRule(),
-        LocalSectorContentRule(),
+        LOCAL_RULE_REGISTRY["local_market_content"],
+        LOCAL_RULE_REGISTRY["local_owned_stock_content"],
+        LOCAL_RULE_REGISTRY["local_sector_content"],
     ]
 
     if not parallel_rules:
@@ -2,7 +2,7 @@
 import logging
 from typing import List, Dict, Any
 from .base import BaseLocalRule
-from batch.utils.data_loader import fetch_user_portfolio, APIConnectionError, DataValidationError
+from batch.utils.data_loader import fetch_user_portfolio_cached, APIConnectionError, DataValidationError
 
 # --- 레지스트리 및 데코레이터 정의 (유지) ---
 LOCAL_RULE_REGISTRY = {}
@@ -19,6 +19,20 @@ class LocalRuleError(Exception):
     """로컬 룰 관련 예외"""
     pass
 
+def select_market_content_ids(contents_list: List[Dict[str, Any]]) -> List[str]:
+    """btopic이 '시장'인 컨텐츠 ID를 반환합니다 (사용자와 무관하므로 컨텍스트 생성 시 1회 계산)."""
+    candidates = []
+    for content in contents_list:
+        if not isinstance(content, dict):
+            continue
+
+        btopic = content.get("btopic")
+        content_id = content.get("_id") or content.get("id")
+
+        if btopic == "시장" and content_id:
+            candidates.append(str(content_id))
+    return candidates
+
 # Local Rule 1: 대주제(btopic)가 '시장' 인 컨텐츠
 @register_local_rule("local_market_content")
 class LocalMarketContentRule(BaseLocalRule):
@@ -45,18 +59,12 @@ class LocalMarketContentRule(BaseLocalRule):
             return []
 
         try:
-            # 유효한 컨텐츠만 필터링
-            candidates = []
-            for content in contents_list:
-                if not isinstance(content, dict):
-                    continue
-                    
-                btopic = content.get("btopic")
-                content_id = content.get("_id") or content.get("id")
-                
-                if btopic == "시장" and content_id:
-                    candidates.append(str(content_id))
-            
+            # 컨텍스트에 미리 계산된 결과가 있으면 사용자마다 전체 컨텐츠를 다시 훑지 않음
+            market_content_ids = context.get('market_content_ids')
+            if market_content_ids is None:
+                market_content_ids = select_market_content_ids(contents_list)
+            candidates = list(market_content_ids)
+
             logger.info(f"[{user_id}] {self.rule_name}: Found {len(candidates)} market-related candidates")
             return candidates
             
@@ -98,7 +106,7 @@ class LocalOwnedStockContentRule(BaseLocalRule):
             portfolio_data = context.get('portfolio_data')
             if portfolio_data is None:
                 logger.debug(f"[{user_id}] {self.rule_name}: Fetching user portfolio...")
-                portfolio_data = fetch_user_portfolio(user_id)
+                portfolio_data = fetch_user_portfolio_cached(user_id)
 
             if not portfolio_data:
                 logger.debug(f"[{user_id}] {self.rule_name}: No portfolio data available")
@@ -205,7 +213,7 @@ class LocalSectorContentRule(BaseLocalRule):
             portfolio_data = context.get('portfolio_data')
             if portfolio_data is None:
                 logger.debug(f"[{user_id}] {self.rule_name}: Fetching user portfolio for sector analysis...")
-                portfolio_data = fetch_user_portfolio(user_id)
+                portfolio_data = fetch_user_portfolio_cached(user_id)
 
             if not portfolio_data:
                 logger.debug(f"[{user_id}] {self.rule_name}: No portfolio data available")
@@ -1,31 +1,96 @@
 # simplers/batch/utils/cf_utils.py
 import logging
+import time
 from typing import Dict, List, Any, Optional, Set, Tuple
-import pandas as pd
 from collections import defaultdict
-from sklearn.metrics.pairwise import cosine_similarity # 코사인 유사도 사용시
-from scipy.sparse import csr_matrix # 희소 행렬 사용시
+from scipy.sparse import csr_matrix, issparse # 희소 행렬 사용시
 import numpy as np
 
 # 설정 로더에서 CF 관련 설정 임포트
 from batch.utils.config_loader import (
-    CF_ITEM_SIMILARITY_METRIC, CF_USER_HISTORY_LIMIT, CF_MIN_CO_OCCURRENCE
+    CF_ITEM_SIMILARITY_METRIC, CF_USER_HISTORY_LIMIT, CF_MIN_CO_OCCURRENCE,
+    CF_TOP_K_NEIGHBORS,
 )
 
 logger = logging.getLogger(__name__)
 
+# 이 수를 넘는 아이템에 대해서는 (top_k 미사용 시에도) 밀집 행렬 대신 CSR 로 보관
+DENSE_SIMILARITY_MAX_ITEMS = 5000
+
 # --- Item-Item 유사도 매트릭스 ---
-item_similarity_matrix: Optional[pd.DataFrame] = None  # Pandas DataFrame 사용 예시
+class ItemSimilarityMatrix:
+    """아이템 ID로 조회하는 Item-Item 유사도 매트릭스.
+
+    pandas DataFrame 대신 float32 ``np.ndarray`` (또는 아이템별 상위 k 이웃만 담은
+    ``csr_matrix``) 와 ``{item_id: row}`` dict 로 보관하여 CF 점수 계산 시 인덱스
+    해싱/BlockManager 오버헤드 없이 조회합니다.
+    """
+
+    def __init__(self, values, item_ids: List[str]):
+        if issparse(values):
+            self.values = csr_matrix(values, dtype=np.float32)
+        else:
+            self.values = np.ascontiguousarray(values, dtype=np.float32)
+        self.item_to_row: Dict[str, int] = {
+            item_id: i for i, item_id in enumerate(item_ids)
+        }
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape
+
+    def submatrix(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """행/열 인덱스 배열로 잘라낸 밀집 부분 행렬을 반환합니다."""
+        if issparse(self.values):
+            return self.values[rows][:, cols].toarray()
+        return self.values[np.ix_(rows, cols)]
+
+
+item_similarity_matrix: Optional[ItemSimilarityMatrix] = None
 item_id_map_cf: Optional[Dict[str, int]] = None  # CF용 아이템 ID<->인덱스 맵
 item_index_map_cf: Optional[Dict[int, str]] = None
 
 
+def _build_item_user_matrix(
+    user_interactions: Dict[str, List[str]], item_id_map: Dict[str, int]
+) -> csr_matrix:
+    """아이템-사용자 이진 희소 행렬(CSR)을 생성합니다. 중복 상호작용은 1번만 카운트합니다."""
+    rows: List[int] = []
+    cols: List[int] = []
+    user_idx = 0
+    for items in user_interactions.values():
+        item_indices = {item_id_map[i] for i in items if i in item_id_map}
+        if not item_indices:
+            continue
+        rows.extend(item_indices)
+        cols.extend([user_idx] * len(item_indices))
+        user_idx += 1
+    data = np.ones(len(rows), dtype=np.float32)
+    return csr_matrix((data, (rows, cols)), shape=(len(item_id_map), user_idx))
+
+
+def _top_k_per_row(
+    rows: np.ndarray, cols: np.ndarray, sims: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """COO 좌표에서 행마다 유사도 상위 k 개 항목만 남깁니다 (밀집 행렬을 만들지 않음)."""
+    order = np.lexsort((-sims, rows))  # 행 오름차순, 행 내 유사도 내림차순
+    rows, cols, sims = rows[order], cols[order], sims[order]
+    row_starts = np.searchsorted(rows, rows, side="left")
+    keep = (np.arange(len(rows)) - row_starts) < k
+    return rows[keep], cols[keep], sims[keep]
+
+
 def build_item_similarity_matrix(
     user_interactions: Dict[str, List[str]],
     all_item_ids: Optional[List[str]] = None,
-) -> Optional[pd.DataFrame]:
+    top_k: Optional[int] = None,
+) -> Optional[ItemSimilarityMatrix]:
     """사용자 상호작용 데이터를 기반으로 아이템 유사도 매트릭스를 생성합니다.
 
+    ``top_k`` (기본값 ``CF_TOP_K_NEIGHBORS``) 가 양수이면 아이템별로 유사도 상위
+    ``top_k`` 개 이웃만 희소 행렬로 보관하여 메모리를 O(n^2) 에서 O(n*k) 로 줄입니다.
+    ``top_k`` 를 쓰지 않더라도 아이템 수가 ``DENSE_SIMILARITY_MAX_ITEMS`` 를 넘으면
+    0이 아닌 유사도만 희소 행렬로 보관합니다.
     계산이 실패하면 ``None`` 을 반환하여 이후 파이프라인에서 CF 모듈을
     비활성화할 수 있도록 합니다.
     """
@@ -35,7 +100,7 @@ def build_item_similarity_matrix(
         logger.info(
             f"Building Item-Item similarity matrix using metric: {CF_ITEM_SIMILARITY_METRIC}..."
         )
-        start_time = pd.Timestamp.now()
+        start_time = time.perf_counter()
 
         if not user_interactions:
             logger.warning(
@@ -61,103 +126,78 @@ def build_item_similarity_matrix(
         num_items = len(unique_item_ids)
         logger.debug(f"Total unique items for CF: {num_items}")
 
-        # 아이템별 상호작용한 사용자 Set 생성: {item_id: {user1, user2, ...}}
-        item_user_sets = defaultdict(set)
-        for user_id, items in user_interactions.items():
-            for item_id in set(items):  # 사용자의 중복 상호작용은 1번만 카운트
-                if item_id in item_id_map_cf:  # 매핑에 있는 아이템만 처리
-                    item_user_sets[item_id].add(user_id)
+        # 아이템-사용자 이진 희소 행렬 (num_items x num_users) 을 한 번만 구성
+        item_user_matrix = _build_item_user_matrix(user_interactions, item_id_map_cf)
+        if item_user_matrix.nnz == 0:
+            logger.warning("No interaction data to build sparse matrix.")
+            return None
+        logger.debug(
+            f"Built Item-User sparse matrix: {item_user_matrix.shape}, Sparsity: {item_user_matrix.nnz / (item_user_matrix.shape[0] * item_user_matrix.shape[1]):.4f}"
+        )
+
+        if CF_ITEM_SIMILARITY_METRIC not in ("jaccard", "cosine"):
+            logger.error(
+                f"Unsupported item similarity metric: {CF_ITEM_SIMILARITY_METRIC}"
+            )
+            return None
 
-        # --- 2. 유사도 계산 ---
-        similarity_data = defaultdict(dict)  # {item_idx1: {item_idx2: score}}
+        # --- 2. 유사도 계산 (희소 행렬 연산으로 벡터화) ---
+        # 공동 출현 수 |A ∩ B| = X @ X.T 와 아이템별 사용자 수 |A| 를 한 번만 계산해
+        # 두 지표가 공유 (이진 행렬이므로 L2 norm 은 sqrt(|A|))
+        co_occurrence = (item_user_matrix @ item_user_matrix.T).tocoo()
+        item_degrees = np.asarray(item_user_matrix.sum(axis=1), dtype=np.float64).ravel()
+        rows, cols = co_occurrence.row, co_occurrence.col
+        intersection = co_occurrence.data.astype(np.float64)
 
         if CF_ITEM_SIMILARITY_METRIC == "jaccard":
-            logger.info("Calculating Jaccard similarity...")
-            item_ids_list = list(item_user_sets.keys())
-            for i in range(len(item_ids_list)):
-                item_id1 = item_ids_list[i]
-                users1 = item_user_sets[item_id1]
-                idx1 = item_id_map_cf[item_id1]
-                for j in range(i, len(item_ids_list)):
-                    item_id2 = item_ids_list[j]
-                    users2 = item_user_sets[item_id2]
-                    idx2 = item_id_map_cf[item_id2]
-
-                    intersection_count = len(users1.intersection(users2))
-                    if intersection_count >= CF_MIN_CO_OCCURRENCE:
-                        union_count = len(users1.union(users2))
-                        if union_count > 0:
-                            sim = intersection_count / union_count
-                            if sim > 0:
-                                similarity_data[idx1][idx2] = sim
-                                if idx1 != idx2:
-                                    similarity_data[idx2][idx1] = sim
+            logger.info("Calculating Jaccard similarity using sparse matrix...")
+            keep = intersection >= CF_MIN_CO_OCCURRENCE
+            rows, cols, intersection = rows[keep], cols[keep], intersection[keep]
+            union = item_degrees[rows] + item_degrees[cols] - intersection
+            sims = intersection / union
             logger.info("Jaccard similarity calculation complete.")
 
-        elif CF_ITEM_SIMILARITY_METRIC == "cosine":
+        else:
             logger.info("Calculating Cosine similarity using sparse matrix...")
-            all_user_ids = set()
-            for users in item_user_sets.values():
-                all_user_ids.update(users)
-            user_id_list = sorted(list(all_user_ids))
-            user_id_map = {user_id: i for i, user_id in enumerate(user_id_list)}
-            num_users = len(user_id_list)
-
-            if num_users == 0:
-                logger.warning(
-                    "No users found in interactions, cannot compute cosine similarity."
-                )
-                return None
-
-            rows, cols, data = [], [], []
-            for item_id, users in item_user_sets.items():
-                item_idx = item_id_map_cf[item_id]
-                for user_id in users:
-                    user_idx = user_id_map[user_id]
-                    rows.append(item_idx)
-                    cols.append(user_idx)
-                    data.append(1)
-
-            if not data:
-                logger.warning("No interaction data to build sparse matrix.")
-                return None
-
-            item_user_matrix = csr_matrix((data, (rows, cols)), shape=(num_items, num_users))
-            logger.debug(
-                f"Built Item-User sparse matrix: {item_user_matrix.shape}, Sparsity: {item_user_matrix.nnz / (num_items * num_users):.4f}"
-            )
-
-            cosine_sim_matrix = cosine_similarity(item_user_matrix, dense_output=False)
+            item_norms = np.sqrt(item_degrees)
+            sims = intersection / (item_norms[rows] * item_norms[cols])
             logger.info("Cosine similarity calculation complete.")
 
             min_similarity_threshold = 0.01
-            non_zero_indices = cosine_sim_matrix.nonzero()
-            for r, c in zip(*non_zero_indices):
-                if r != c:
-                    sim = cosine_sim_matrix[r, c]
-                    if sim >= min_similarity_threshold:
-                        similarity_data[r][c] = sim
+            keep = (rows != cols) & (sims >= min_similarity_threshold)
+            rows, cols, sims = rows[keep], cols[keep], sims[keep]
 
-        else:
-            logger.error(
-                f"Unsupported item similarity metric: {CF_ITEM_SIMILARITY_METRIC}"
-            )
-            return None
+        if top_k is None:
+            top_k = CF_TOP_K_NEIGHBORS
 
         try:
-            item_similarity_matrix = pd.DataFrame.from_dict(
-                similarity_data, orient="index"
-            ).fillna(0)
+            # 유사도가 하나라도 있는 아이템만 행/열로 사용 (두 지표 모두 대칭)
+            labels = np.union1d(rows, cols)
+            row_pos = np.searchsorted(labels, rows)
+            col_pos = np.searchsorted(labels, cols)
+            if top_k and top_k > 0:
+                row_pos, col_pos, sims = _top_k_per_row(row_pos, col_pos, sims, top_k)
+            if (top_k and top_k > 0) or len(labels) > DENSE_SIMILARITY_MAX_ITEMS:
+                values = csr_matrix(
+                    (sims.astype(np.float32), (row_pos, col_pos)),
+                    shape=(len(labels), len(labels)),
+                )
+            else:
+                values = np.zeros((len(labels), len(labels)), dtype=np.float32)
+                values[row_pos, col_pos] = sims
+            item_similarity_matrix = ItemSimilarityMatrix(
+                values, [item_index_map_cf[int(idx)] for idx in labels]
+            )
             logger.info(
                 f"Item similarity matrix built. Shape: {item_similarity_matrix.shape}"
             )
         except Exception as e:  # pragma: no cover - 예외 처리
             logger.error(
-                f"Error converting similarity data to DataFrame: {e}", exc_info=True
+                f"Error building similarity matrix: {e}", exc_info=True
             )
             item_similarity_matrix = None
 
-        duration = (pd.Timestamp.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         logger.info(f"Item similarity build process took {duration:.2f} seconds.")
         return item_similarity_matrix
 
@@ -170,42 +210,42 @@ def build_item_similarity_matrix(
 def get_collaborative_filtering_scores(
     user_history_item_ids: List[str],
     candidate_item_ids: Set[str],
-    similarity_matrix: Optional[pd.DataFrame],
+    similarity_matrix: Optional[ItemSimilarityMatrix],
 ) -> Dict[str, float]:
     """사용자의 상호작용 기록과 유사도 매트릭스를 이용해 CF 점수를 계산합니다."""
 
     scores = defaultdict(float)
     if not user_history_item_ids or not candidate_item_ids:
         return dict(scores)
-    if similarity_matrix is None or item_id_map_cf is None:
+    if similarity_matrix is None:
         logger.warning("Item similarity matrix not built. Cannot compute CF scores.")
         return dict(scores)
 
+    item_to_row = similarity_matrix.item_to_row
     recent_history = user_history_item_ids[-CF_USER_HISTORY_LIMIT:]
-    user_interacted_indices = {
-        item_id_map_cf[item_id]
-        for item_id in recent_history
-        if item_id in item_id_map_cf
-    }
+    history_rows = np.fromiter(
+        {item_to_row[item_id] for item_id in recent_history if item_id in item_to_row},
+        dtype=np.intp,
+    )
 
-    if not user_interacted_indices:
+    if history_rows.size == 0:
         return dict(scores)
 
-    for cand_id in candidate_item_ids:
-        cand_idx = item_id_map_cf.get(cand_id)
-        if cand_idx is None:
-            continue
-        total_similarity = 0.0
-        count = 0
-        if cand_idx in similarity_matrix.index:
-            sim_row = similarity_matrix.loc[cand_idx]
-            for hist_idx in user_interacted_indices:
-                if hist_idx in sim_row.index:
-                    similarity = sim_row[hist_idx]
-                    if similarity > 0:
-                        total_similarity += similarity
-                        count += 1
-        if count > 0:
-            scores[cand_id] = max(0.0, float(total_similarity))
-
-    return dict(scores)
\ No newline at end of file
+    cand_ids = [cand_id for cand_id in candidate_item_ids if cand_id in item_to_row]
+    if not cand_ids:
+        return dict(scores)
+    cand_rows = np.fromiter(
+        (item_to_row[cand_id] for cand_id in cand_ids), dtype=np.intp, count=len(cand_ids)
+    )
+
+    # (후보 x 최근 이력) 부분 행렬을 한 번에 잘라 양수 유사도만 행 단위로 합산
+    similarities = similarity_matrix.submatrix(cand_rows, history_rows)
+    positive = similarities > 0
+    totals = np.where(positive, similarities, 0.0).sum(axis=1)
+    has_positive = positive.any(axis=1)
+
+    for cand_id, total, matched in zip(cand_ids, totals.tolist(), has_positive.tolist()):
+        if matched:
+            scores[cand_id] = max(0.0, total)
+
+    return dict(scores)
@@ -6,6 +6,11 @@ from common.config import config, MONGO_CONFIG, OPENSEARCH_CONFIG, ORACLE_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Batch run configuration
+BATCH_CONFIG = config.get("batch", {})
+# Directory for the JSON dump written when saving results to MongoDB fails
+BATCH_FALLBACK_DIR = BATCH_CONFIG.get("fallback_dir", ".")
+
 # Batch scoring configuration
 BATCH_SCORING_CONFIG = config.get("batch_scoring", {})
 SOURCE_WEIGHTS = BATCH_SCORING_CONFIG.get(
@@ -21,6 +26,7 @@ CB_USER_HISTORY_LIMIT = BATCH_SCORING_CONFIG.get("cb_user_history_limit", 50)
 CF_ITEM_SIMILARITY_METRIC = BATCH_SCORING_CONFIG.get("cf_item_similarity_metric", "jaccard")
 CF_USER_HISTORY_LIMIT = BATCH_SCORING_CONFIG.get("cf_user_history_limit", 100)
 CF_MIN_CO_OCCURRENCE = BATCH_SCORING_CONFIG.get("cf_min_co_occurrence", 2)
+CF_TOP_K_NEIGHBORS = BATCH_SCORING_CONFIG.get("cf_top_k_neighbors", 0)
 
 # Rule configuration
 RULES_CONFIG: Dict[str, Any] = config.get("rules", {})
@@ -2,11 +2,14 @@
 import logging
 from typing import Dict, List, Any
 from collections import defaultdict
+import threading
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd # Timestamp 사용 시
 import requests
-import json
+import orjson
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -58,12 +61,36 @@ def validate_customer_id(customer_no: str, max_length: int = 20) -> bool:
     return True
 
 
-def create_robust_session(max_retries: int = 3, backoff_factor: float = 0.3) -> requests.Session:
+def validate_customer_ids(customer_nos: List[Any], max_length: int = 20) -> np.ndarray:
+    """여러 고객번호를 한 번에 검증하는 ``validate_customer_id`` 의 벡터화 버전.
+
+    Args:
+        customer_nos: 검증할 고객번호 리스트
+        max_length: 허용할 최대 길이 (기본 20)
+
+    Returns:
+        각 고객번호의 유효 여부를 담은 boolean 배열
+    """
+    values = np.asarray(customer_nos, dtype=str)
+    if values.size == 0:
+        return np.zeros(0, dtype=bool)
+    # None 은 'None' 으로 변환되어 숫자 검사에서 걸러진다 (빈 문자열은 isdigit 이 False)
+    return np.char.isdigit(values) & (np.char.str_len(values) <= max_length)
+
+
+def create_robust_session(
+    max_retries: int = 3,
+    backoff_factor: float = 0.3,
+    pool_connections: int = 32,
+    pool_maxsize: int = 32,
+) -> requests.Session:
     """재시도 로직이 포함된 requests 세션을 생성합니다.
 
     Args:
         max_retries: 최대 재시도 횟수
         backoff_factor: 재시도 간 대기 시간 배율
+        pool_connections: 호스트별로 유지할 커넥션 풀 개수
+        pool_maxsize: 커넥션 풀당 최대 커넥션 수
 
     Returns:
         재시도 설정이 적용된 requests.Session 객체
@@ -76,11 +103,38 @@ def create_robust_session(max_retries: int = 3, backoff_factor: float = 0.3) ->
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=["GET", "POST"],
     )
-    adapter = HTTPAdapter(max_retries=retries)
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retries,
+    )
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
+
+# 포트폴리오 API 호출용 공유 세션 (HTTP keep-alive 로 커넥션 재사용)
+_PORTFOLIO_MAX_RETRIES = 3
+_PORTFOLIO_POOL_SIZE = 32
+_PORTFOLIO_CACHE_SIZE = 100_000
+# 조회에 성공한(비어 있지 않은) 포트폴리오만 보관하는 고객번호 -> 포트폴리오 캐시
+_PORTFOLIO_CACHE: Dict[str, Dict[str, Any]] = {}
+_PORTFOLIO_CACHE_LOCK = threading.Lock()
+_PORTFOLIO_SESSION = create_robust_session(
+    _PORTFOLIO_MAX_RETRIES,
+    pool_connections=_PORTFOLIO_POOL_SIZE,
+    pool_maxsize=_PORTFOLIO_POOL_SIZE,
+)
+
+
+def close_portfolio_session() -> None:
+    """포트폴리오 API 공유 세션의 커넥션 풀과 조회 캐시를 정리합니다 (종료 시 호출)."""
+    with _PORTFOLIO_CACHE_LOCK:
+        _PORTFOLIO_CACHE.clear()
+    _PORTFOLIO_SESSION.close()
+    logger.debug("Portfolio API session closed.")
+
+
 def load_user_interactions(
     db: Any,
     user_ids: List[str],
@@ -93,6 +147,14 @@ def load_user_interactions(
     추출하고, 암시적 피드백(클릭/조회 로그)은 OpenSearch ``curation-logs-*``
     인덱스에서 ``cust_no`` 와 ``curation_id`` 정보를 조회하여 수집합니다.
 
+    ``curation`` 컬렉션의 ``{liked_users: 1, id: 1}`` 복합 인덱스는 첫 ``$match`` 의
+    ``liked_users`` 조회에만 쓰여 컬렉션 전체 스캔을 피하게 해 줍니다. ``create_dt`` 가
+    인덱스에 없으므로 매칭된 문서는 읽어 와야 하고, 이후 ``$sort``/``$unwind``/``$group``
+    은 인덱스 없이 매칭된 문서만으로 처리됩니다 (정렬은 ``allowDiskUse`` 허용).
+
+    사용자별 명시적 피드백 목록은 좋아요를 누른 시각이 아니라 콘텐츠(curation) 생성
+    시각(``create_dt``) 오름차순으로 정렬됩니다. 좋아요 시각은 저장되지 않습니다.
+
     Args:
         db: MongoDB 데이터베이스 객체
         user_ids: 상호작용 기록을 로드할 사용자 ID 리스트
@@ -110,24 +172,29 @@ def load_user_interactions(
     if not user_ids:
         return interactions
 
-    start_time = pd.Timestamp.now()
+    start_time = time.perf_counter()
     user_id_set = {str(u) for u in user_ids}
 
     # --- 1. MongoDB 명시적 피드백 (liked_users) ---
+    # 사용자별 집계는 서버에서 $group 으로 처리하여 사용자당 한 문서만 전송받음.
+    # $group 전에 콘텐츠 생성 시각 오름차순(동률은 id)으로 정렬해 $push 순서를 고정하므로,
+    # 각 사용자의 items 는 생성이 오래된 콘텐츠부터 쌓이고 CF 는 뒤쪽 CF_USER_HISTORY_LIMIT 개
+    # (가장 최근에 생성된 콘텐츠)를 사용. 좋아요를 누른 순서와는 무관함.
+    # 인덱스는 첫 $match 에만 쓰이고 $sort 는 매칭된 문서에 대해 인덱스 없이 수행됨.
     try:
         curation_col = db["curation"]
-        cursor = curation_col.find(
-            {"liked_users": {"$in": list(user_id_set)}},
-            {"_id": 0, "id": 1, "liked_users": 1},
-        )
+        user_id_list = list(user_id_set)
+        pipeline = [
+            {"$match": {"liked_users": {"$in": user_id_list}, "id": {"$nin": [None, ""]}}},
+            {"$project": {"_id": 0, "id": 1, "liked_users": 1, "create_dt": 1}},
+            {"$sort": {"create_dt": 1, "id": 1}},
+            {"$unwind": "$liked_users"},
+            {"$match": {"liked_users": {"$in": user_id_list}}},
+            {"$group": {"_id": "$liked_users", "items": {"$push": "$id"}}},
+        ]
+        cursor = curation_col.aggregate(pipeline, allowDiskUse=True, batchSize=10_000)
         for doc in cursor:
-            item_id = doc.get("id")
-            liked_users = doc.get("liked_users", [])
-            if item_id and liked_users:
-                for uid in liked_users:
-                    s_uid = str(uid)
-                    if s_uid in user_id_set:
-                        interactions[s_uid].append(item_id)
+            interactions[str(doc["_id"])].extend(doc.get("items", []))
     except Exception as e:
         logger.warning(f"Failed to load explicit interactions: {e}")
 
@@ -168,13 +235,14 @@ def load_user_interactions(
                     f"Failed to load implicit interactions for user {uid}: {e}"
                 )
 
-    duration = (pd.Timestamp.now() - start_time).total_seconds()
+    duration = time.perf_counter() - start_time
     logger.info(
         f"Loaded interactions for {len(interactions)} users in {duration:.2f} seconds."
     )
 
     return interactions
 
+
 # 다른 데이터 로더 함수들 추가 가능 (예: fetch_stock_metadata)
 
 def fetch_user_portfolio(customer_no: str, api_base_url: str = "http://172.17.4.53:8150", 
@@ -204,7 +272,11 @@ def fetch_user_portfolio(customer_no: str, api_base_url: str = "http://172.17.4.
     if not api_base_url or not isinstance(api_base_url, str):
         raise DataValidationError(f"Invalid API base URL: {api_base_url}")
     
-    session = create_robust_session(max_retries)
+    # 기본 재시도 설정이면 공유 세션을 재사용하고, 그 외에는 일회성 세션을 생성
+    if max_retries == _PORTFOLIO_MAX_RETRIES:
+        session = _PORTFOLIO_SESSION
+    else:
+        session = create_robust_session(max_retries)
     
     try:
         url = f"{api_base_url}/api/mu800"
@@ -237,8 +309,8 @@ def fetch_user_portfolio(customer_no: str, api_base_url: str = "http://172.17.4.
         
         # JSON 파싱
         try:
-            data = response.json()
-        except json.JSONDecodeError as e:
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid JSON response for customer {customer_no}: {e}")
             return {}
         
@@ -267,7 +339,101 @@ def fetch_user_portfolio(customer_no: str, api_base_url: str = "http://172.17.4.
         return {}
     
     finally:
-        session.close()
+        if session is not _PORTFOLIO_SESSION:
+            session.close()
+
+def fetch_user_portfolio_cached(customer_no: str) -> Dict[str, Any]:
+    """
+    기본 설정으로 조회한 포트폴리오를 배치 실행 동안 고객번호 단위로 캐시합니다.
+
+    같은 고객에 대해 여러 규칙/파이프라인 단계가 포트폴리오를 요청하므로 중복 API 호출을
+    제거합니다. 반환된 딕셔너리는 호출자 간에 공유되므로 수정하지 않아야 합니다.
+    일시적인 HTTP 오류/타임아웃으로 빈 결과가 반환된 경우는 캐시하지 않아 다음 호출에서 다시 조회합니다.
+
+    Args:
+        customer_no: 고객번호
+
+    Returns:
+        포트폴리오 정보 딕셔너리 (실패 시 빈 딕셔너리)
+    """
+    cached = _PORTFOLIO_CACHE.get(customer_no)
+    if cached is not None:
+        return cached
+
+    portfolio = fetch_user_portfolio(customer_no)
+    if portfolio:
+        with _PORTFOLIO_CACHE_LOCK:
+            if len(_PORTFOLIO_CACHE) >= _PORTFOLIO_CACHE_SIZE:
+                # 가장 먼저 캐시된 항목부터 제거
+                _PORTFOLIO_CACHE.pop(next(iter(_PORTFOLIO_CACHE)))
+            _PORTFOLIO_CACHE[customer_no] = portfolio
+    return portfolio
+
+def fetch_user_portfolios_bulk(
+    customer_nos: List[str],
+    max_workers: int = 16,
+    **kwargs: Any,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 고객의 포트폴리오 정보를 스레드 풀로 동시에 조회합니다.
+
+    공유 세션의 커넥션 풀을 함께 사용하므로 ``max_workers`` 는 풀 크기를 넘지 않도록
+    제한됩니다.
+
+    Args:
+        customer_nos: 조회할 고객번호 리스트
+        max_workers: 동시에 실행할 최대 요청 수
+        **kwargs: ``fetch_user_portfolio`` 에 그대로 전달할 추가 인자
+
+    Returns:
+        {customer_no: 포트폴리오 정보} 형태의 딕셔너리 (실패한 고객은 빈 딕셔너리)
+    """
+    unique_customer_nos = list(dict.fromkeys(customer_nos))
+    if not unique_customer_nos:
+        return {}
+
+    # 형식이 잘못된 고객번호는 API 를 호출하지 않고 빈 포트폴리오로 처리
+    valid_mask = validate_customer_ids(unique_customer_nos)
+    portfolios: Dict[str, Dict[str, Any]] = {}
+    if not valid_mask.all():
+        invalid_customer_nos = [c for c, ok in zip(unique_customer_nos, valid_mask.tolist()) if not ok]
+        logger.warning(
+            f"Skipping {len(invalid_customer_nos)} invalid customer IDs, returning empty portfolios"
+        )
+        portfolios.update((c, {}) for c in invalid_customer_nos)
+        unique_customer_nos = [c for c, ok in zip(unique_customer_nos, valid_mask.tolist()) if ok]
+        if not unique_customer_nos:
+            return portfolios
+
+    if max_workers > _PORTFOLIO_POOL_SIZE:
+        logger.warning(
+            f"max_workers={max_workers} exceeds portfolio session pool size "
+            f"({_PORTFOLIO_POOL_SIZE}); limiting to pool size"
+        )
+        max_workers = _PORTFOLIO_POOL_SIZE
+    max_workers = max(1, min(max_workers, len(unique_customer_nos)))
+
+    logger.info(
+        f"Fetching portfolios for {len(unique_customer_nos)} customers "
+        f"with {max_workers} workers..."
+    )
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_user_portfolio, customer_no, **kwargs): customer_no
+            for customer_no in unique_customer_nos
+        }
+        for future in as_completed(futures):
+            customer_no = futures[future]
+            try:
+                portfolios[customer_no] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to fetch portfolio for customer {customer_no}: {e}")
+                portfolios[customer_no] = {}
+
+    elapsed_time = time.time() - start_time
+    logger.info(f"Fetched {len(portfolios)} portfolios in {elapsed_time:.2f}s")
+    return portfolios
 
 def validate_opensearch_client(os_client) -> bool:
     """
@@ -290,13 +456,61 @@ def validate_opensearch_client(os_client) -> bool:
         logger.warning(f"OpenSearch client validation failed: {e}")
         return False
 
+# 주식 시세 조회 쿼리 (인덱스와 무관하게 동일하므로 모듈 로드 시 한 번만 생성)
+_STOCK_SOURCE_FIELDS = ("shrt_code", "country", "1d_returns", "close_price", "volume", "market_cap")
+_STOCK_QUERY_BODY = {
+    "query": {
+        "bool": {
+            "must": [
+                {"exists": {"field": "1d_returns"}},
+                {"terms": {"country": ["Korea", "USA"]}},
+                {"range": {"1d_returns": {"gte": -50, "lte": 50}}}  # 비현실적인 수익률 제외
+            ],
+            "must_not": [
+                {"term": {"shrt_code": ""}},  # 빈 종목코드 제외
+                {"range": {"1d_returns": {"gte": "null"}}}  # null 값 제외
+            ]
+        }
+    },
+    "sort": [{"1d_returns": {"order": "desc", "missing": "_last"}}]
+}
+
+def _search_stock_index(os_client, index_name: str, max_records: int) -> tuple:
+    """단일 시세 인덱스를 조회하고 (응답, 소요 시간) 을 반환합니다."""
+    logger.debug(f"Querying index: {index_name}")
+    start_time = time.time()
+    response = os_client.search(
+        index=index_name,
+        size=max_records,
+        _source=_STOCK_SOURCE_FIELDS,
+        body=_STOCK_QUERY_BODY,
+        ignore=[404]
+    )
+    return response, time.time() - start_time
+
+def _search_stock_indexes(os_client, index_names: List[str], max_records: int) -> Dict[str, tuple]:
+    """여러 시세 인덱스를 공유 클라이언트(커넥션 풀)로 동시에 조회합니다. 실패한 인덱스는 결과에서 빠집니다."""
+    responses = {}
+    with ThreadPoolExecutor(max_workers=len(index_names)) as executor:
+        futures = {
+            executor.submit(_search_stock_index, os_client, index_name, max_records): index_name
+            for index_name in index_names
+        }
+        for future in as_completed(futures):
+            index_name = futures[future]
+            try:
+                responses[index_name] = future.result()
+            except Exception as e:
+                logger.warning(f"Error querying index {index_name}: {e}")
+    return responses
+
 def fetch_latest_stock_data(os_client, days_back: int = 3, max_records: int = 1000) -> List[Dict[str, Any]]:
     """
     OpenSearch에서 최신 주식 시세 데이터를 가져옵니다.
     
     Args:
         os_client: OpenSearch 클라이언트
-        days_back: 며칠 전까지 데이터를 조회할지
+        days_back: 최근 몇 영업일(주말 제외)의 인덱스를 조회할지
         max_records: 최대 조회할 레코드 수
         
     Returns:
@@ -319,98 +533,75 @@ def fetch_latest_stock_data(os_client, days_back: int = 3, max_records: int = 10
     logger.info(f"Fetching latest stock data from OpenSearch (last {days_back} days, max {max_records} records)...")
     
     stock_data = []
+    seen_codes = set()  # 같은 종목코드는 최신 인덱스의 값만 사용
     successful_queries = 0
     
-    # 최근 며칠간의 인덱스에서 데이터 조회
-    for i in range(days_back):
-        date = (datetime.now() - timedelta(days=i)).strftime('%Y%m%d')
-        index_name = f"screen-{date}"
+    # 최근 영업일의 인덱스만 조회 (주말 인덱스는 존재하지 않음)
+    business_days = pd.bdate_range(end=datetime.now().date(), periods=days_back)
+    index_names = [f"screen-{date}" for date in business_days.strftime('%Y%m%d')[::-1]]
+    responses = {}
+    
+    # 최신 인덱스부터 순서대로 처리하여 종목별로 가장 최근 값을 사용.
+    # 최신 인덱스는 단독으로 먼저 조회하고, 그것만으로 부족할 때만 나머지 인덱스를 한꺼번에 동시 조회
+    for position, index_name in enumerate(index_names):
+        if position == 0:
+            responses.update(_search_stock_indexes(os_client, index_names[:1], max_records))
+        elif position == 1:
+            responses.update(_search_stock_indexes(os_client, index_names[1:], max_records))
+        if index_name not in responses:
+            continue
+        response, elapsed_time = responses[index_name]
         
         try:
-            logger.debug(f"Querying index: {index_name}")
-            
-            start_time = time.time()
-            response = os_client.search(
-                index=index_name,
-                size=max_records,
-                _source=["shrt_code", "country", "1d_returns", "close_price", "volume", "market_cap"],
-                body={
-                    "query": {
-                        "bool": {
-                            "must": [
-                                {"exists": {"field": "1d_returns"}},
-                                {"terms": {"country": ["Korea", "USA"]}},
-                                {"range": {"1d_returns": {"gte": -50, "lte": 50}}}  # 비현실적인 수익률 제외
-                            ],
-                            "must_not": [
-                                {"term": {"shrt_code": ""}},  # 빈 종목코드 제외
-                                {"range": {"1d_returns": {"gte": "null"}}}  # null 값 제외
-                            ]
-                        }
-                    },
-                    "sort": [{"1d_returns": {"order": "desc", "missing": "_last"}}]
-                },
-                ignore=[404]
-            )
-            elapsed_time = time.time() - start_time
-            
             if 'hits' not in response:
                 logger.warning(f"No hits field in response for index {index_name}")
                 continue
                 
             hits = response.get('hits', {}).get('hits', [])
+            sources = [hit.get('_source', {}) for hit in hits]
             valid_records = 0
-            
-            for hit in hits:
-                source = hit.get('_source', {})
-                
-                # 데이터 검증
-                if not source.get('shrt_code'):
-                    continue
-                    
-                if source.get('1d_returns') is None:
+
+            # 수익률 검증을 한 번에 수행 (숫자가 아니거나 50% 초과 변동은 비현실적이므로 제외)
+            returns = pd.to_numeric(
+                pd.Series([source.get('1d_returns') for source in sources], dtype=object),
+                errors='coerce',
+            ).to_numpy(dtype=np.float64)
+            valid_mask = ~np.isnan(returns) & (np.abs(returns) <= 50)
+            invalid_count = len(sources) - int(valid_mask.sum())
+            if invalid_count:
+                logger.debug(f"Index {index_name}: skipped {invalid_count} records with invalid 1d_returns")
+
+            for source, returns_value, is_valid in zip(sources, returns.tolist(), valid_mask.tolist()):
+                if not is_valid:
                     continue
-                    
-                try:
-                    # 수익률이 숫자인지 확인
-                    returns = float(source.get('1d_returns', 0))
-                    if abs(returns) > 50:  # 50% 이상 변동은 비현실적
-                        continue
-                        
-                    source['1d_returns'] = returns
-                    stock_data.append(source)
-                    valid_records += 1
-                    
-                except (ValueError, TypeError):
-                    logger.debug(f"Invalid 1d_returns value for {source.get('shrt_code')}: {source.get('1d_returns')}")
+
+                # 빈 종목코드 및 이미 수집한 종목코드 제외
+                code = source.get('shrt_code')
+                if not code or code in seen_codes:
                     continue
-                    
+
+                source['1d_returns'] = returns_value
+                seen_codes.add(code)
+                stock_data.append(source)
+                valid_records += 1
+
             logger.info(f"Index {index_name}: {valid_records} valid records in {elapsed_time:.2f}s")
             successful_queries += 1
             
-            # 충분한 데이터를 얻었으면 중단
+            # 충분한 데이터를 얻었으면 중단 (최신 인덱스에서 충분하면 나머지 인덱스는 조회하지 않음)
             if len(stock_data) >= max_records // 2:
                 break
                 
         except Exception as e:
-            logger.warning(f"Error querying index {index_name}: {e}")
+            logger.warning(f"Error processing response from index {index_name}: {e}")
             continue
     
     if successful_queries == 0:
         logger.error("Failed to query any OpenSearch indexes")
         return []
     
-    # 중복 제거 (같은 종목코드)
-    seen_codes = set()
-    unique_stock_data = []
-    for stock in stock_data:
-        code = stock.get('shrt_code')
-        if code not in seen_codes:
-            seen_codes.add(code)
-            unique_stock_data.append(stock)
-    
     logger.info(
-        f"Fetched {len(unique_stock_data)} unique stock records from OpenSearch "
+        f"Fetched {len(stock_data)} unique stock records from OpenSearch "
         f"({successful_queries}/{days_back} indexes successful)"
     )
-    return unique_stock_data
+    return stock_data
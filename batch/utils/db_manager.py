@@ -1,16 +1,22 @@
 # simplers/batch/utils/db_manager.py
 import logging
-from contextlib import contextmanager
-from typing import Dict, List, Any
-
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+import os
+import random
+import time
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import dask
 import dask.dataframe as dd
-import dask.bag as dbag
 from datetime import datetime
 
-from batch.utils.config_loader import MONGO_CONFIG
+from batch.utils.config_loader import BATCH_FALLBACK_DIR
 from common.db import (
     connect_mongo, get_mongo_db, close_mongo,
     connect_opensearch, get_os_client, close_opensearch,
@@ -40,63 +46,313 @@ class DataIntegrityError(DatabaseError):
     pass
 
 
-@contextmanager
-def mongodb_connection_context():
-    """Context manager for safe MongoDB connections."""
-    client = None
-    try:
-        uri = MONGO_CONFIG.get("uri")
-        db_name = MONGO_CONFIG.get("db_name")
-        if not uri or not db_name:
-            raise MongoDBError("MongoDB URI or DB Name not configured in config.yaml")
-        client = MongoClient(
-            uri,
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=10000,
-            socketTimeoutMS=30000,
-            maxPoolSize=10,
-            retryWrites=True,
-        )
-        client.admin.command("ping")
-        db = client[db_name]
-        yield db
-    except ServerSelectionTimeoutError:
-        logger.error("MongoDB server selection timeout - check if MongoDB is running")
-        raise MongoDBError("MongoDB server not available")
-    except ConnectionFailure as e:
-        logger.error(f"MongoDB connection failure: {e}")
-        raise MongoDBError(f"Failed to connect to MongoDB: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected MongoDB error: {e}")
-        raise MongoDBError(f"MongoDB error: {e}")
-    finally:
-        if client:
-            client.close()
+# Data loading functions
+
+# Fields fetched from each collection. The same projection is used by every
+# partition so that all Dask partitions share one set of columns.
+CURATION_FIELDS = (
+    '_id', 'btopic', 'stopic', 'label', 'gic_code', 'krw_currv_sumamt', 'stk_name',
+    'title', 'result', 'thumbnail', 'total_click_cnt', 'recent_click_cnt',
+    'liked_users', 'disliked_users', 'live_from', 'entry_curation', 'ext_lm_yn',
+    'category', 'sector', 'create_dt', 'modi_dt',
+)
+CURATION_TEXT_FIELDS = (
+    'id', 'btopic', 'stopic', 'label', 'gic_code', 'stk_name', 'title', 'result',
+    'thumbnail', 'ext_lm_yn', 'category', 'sector',
+)
+USER_FIELDS = (
+    '_id', 'cust_no', 'cust_nm', 'cyber_id', 'last_login_dt', 'user_vec', 'concerns',
+    'owned_stocks', 'cluster_id', 'preferred_category', 'create_dt', 'modi_dt',
+)
+USER_TEXT_FIELDS = ('id', 'cust_no', 'cust_nm', 'cyber_id', 'preferred_category')
+
+# Column dtypes applied to every loaded partition: text as pyarrow strings,
+# user-id lists as Arrow list<string>, counters as nullable pyarrow integers.
+_PYARROW_STRING = pd.StringDtype("pyarrow")
+_PYARROW_STRING_LIST = pd.ArrowDtype(pa.list_(pa.string()))
+CURATION_DTYPES: Dict[str, Any] = {
+    **{field: _PYARROW_STRING for field in CURATION_TEXT_FIELDS},
+    'liked_users': _PYARROW_STRING_LIST,
+    'disliked_users': _PYARROW_STRING_LIST,
+    'total_click_cnt': 'int64[pyarrow]',
+    'recent_click_cnt': 'int64[pyarrow]',
+    'krw_currv_sumamt': 'double[pyarrow]',
+}
+USER_DTYPES: Dict[str, Any] = {field: _PYARROW_STRING for field in USER_TEXT_FIELDS}
+
+# Fields computed by the server while projecting, so documents arrive in their
+# final shape and need no per-document Python post-processing.
+CURATION_COMPUTED_FIELDS: Dict[str, Any] = {'id': {'$toString': '$_id'}}
+USER_COMPUTED_FIELDS: Dict[str, Any] = {
+    'id': {'$toString': '$_id'},
+    'owned_stocks': {'$ifNull': ['$owned_stocks', []]},
+}
+
+_NO_STRING_CONVERSION = {"dataframe.convert-string": False}
+
+# Covers the last_login_dt filter of load_users together with _id, so counting
+# and computing partition boundaries never have to fetch user documents.
+USER_LOGIN_INDEX = [('last_login_dt', DESCENDING), ('_id', ASCENDING)]
+
+# Target in-memory size of one Dask partition for frames loaded eagerly.
+TARGET_PARTITION_MB = 128
+# Lazily loaded collections get at least this many partitions per usable CPU,
+# but never fewer than MIN_PARTITION_DOCS documents per partition.
+PARTITIONS_PER_CPU = 4
+MIN_PARTITION_DOCS = 100
+
+
+def _documents_to_frame(
+    docs: Iterable[Dict[str, Any]],
+    columns: Optional[Iterable[str]] = None,
+    dtypes: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """Build a Pandas DataFrame column by column from an iterable of documents.
+
+    Documents are decoded into per-field lists (structure of arrays) while the
+    cursor is consumed, so no intermediate list of row dicts is kept. Fields
+    missing from a document are filled with ``None``. When ``columns`` is given
+    the frame has exactly those columns and is cast to ``dtypes`` (numeric
+    columns are coerced, invalid values become missing); otherwise columns are
+    inferred and all-string columns are stored as pyarrow-backed strings.
+    """
+    fixed_columns = columns is not None
+    data: Dict[str, List[Any]] = {col: [] for col in columns} if fixed_columns else {}
+    num_rows = 0
+    for doc in docs:
+        for key, value in doc.items():
+            column = data.get(key)
+            if column is None:
+                if fixed_columns:
+                    continue
+                column = data[key] = [None] * num_rows
+            column.append(value)
+        num_rows += 1
+        for column in data.values():
+            if len(column) < num_rows:
+                column.append(None)
+
+    if fixed_columns:
+        column_dtypes = {col: dtype for col, dtype in (dtypes or {}).items() if col in data}
+    else:
+        column_dtypes = {
+            col: _PYARROW_STRING for col, values in data.items()
+            if values and all(isinstance(v, str) for v in values if v is not None)
+        }
+    # Typed columns are built as arrays straight from the decoded lists, so
+    # pandas neither infers their dtype nor copies them again.
+    arrays: Dict[str, Any] = {}
+    for col, values in data.items():
+        dtype = column_dtypes.get(col)
+        if dtype is not None:
+            arrays[col] = _typed_array(values, dtype)
+        elif num_rows == 0:
+            arrays[col] = np.array([], dtype=object)
+        else:
+            arrays[col] = values
+    return pd.DataFrame(arrays, columns=list(data), copy=False)
+
+
+def _typed_array(values: List[Any], dtype: Any) -> Any:
+    """Build one loaded column of the given dtype from its decoded values."""
+    if dtype is _PYARROW_STRING:
+        return pd.array(values, dtype=dtype)
+    if isinstance(dtype, pd.ArrowDtype) and pa.types.is_list(dtype.pyarrow_dtype):
+        try:
+            array = pa.array(values, type=dtype.pyarrow_dtype)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = pa.array(
+                [[str(v) for v in vals] if isinstance(vals, list) else None for vals in values],
+                type=dtype.pyarrow_dtype,
+            )
+        return pd.arrays.ArrowExtensionArray(array)
+    numbers = pd.to_numeric(np.asarray(values, dtype=object), errors='coerce')
+    target = pd.api.types.pandas_dtype(dtype)
+    if (
+        isinstance(target, pd.ArrowDtype)
+        and pa.types.is_integer(target.pyarrow_dtype)
+        and numbers.dtype.kind == 'f'
+    ):
+        # Fractional (or infinite) values cannot be cast to an integer column;
+        # treat them as invalid so they become missing instead of failing the partition.
+        numbers = np.where(np.mod(numbers, 1) == 0, numbers, np.nan)
+    return pd.array(numbers, dtype=dtype)
+
+
+def _available_cpus() -> int:
+    """CPUs this process may run on (the affinity mask where the OS exposes it)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _partitions_for_count(total: int, partition_size: int) -> int:
+    """Partitions for ``total`` documents: ``partition_size`` documents each,
+    raised so every CPU gets a few partitions while they stay non-trivial."""
+    by_size = -(-total // partition_size)
+    by_cpus = min(_available_cpus() * PARTITIONS_PER_CPU, total // MIN_PARTITION_DOCS)
+    return max(1, by_size, by_cpus)
+
+
+def _partitions_for_size(mem_usage_mb: float, target_mb: float = TARGET_PARTITION_MB) -> int:
+    """Number of partitions needed to keep each one around ``target_mb`` in memory."""
+    return max(1, int(-(-mem_usage_mb // target_mb)))
+
+
+def _frame_to_dask(frame: pd.DataFrame, **partition_kwargs: Any) -> dd.DataFrame:
+    """Wrap a Pandas DataFrame as a Dask DataFrame without Dask's automatic string
+    conversion, which would otherwise stringify list/dict columns (e.g. ``liked_users``)."""
+    with dask.config.set(_NO_STRING_CONVERSION):
+        return dd.from_pandas(frame, **partition_kwargs)
+
+
+def frame_to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a loaded DataFrame into plain dict records with ``None`` for missing values.
+
+    Arrow-backed columns are converted through Arrow so list columns come back
+    as Python lists rather than NumPy arrays.
+    """
+    columns: Dict[str, List[Any]] = {}
+    for col in frame.columns:
+        values = frame[col]
+        if isinstance(values.dtype, pd.ArrowDtype):
+            columns[col] = pa.array(values).to_pylist()
+        else:
+            columns[col] = values.astype(object).where(values.notna(), None).tolist()
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
 
 
-# Data loading functions
+def _ensure_index(coll, keys: List[tuple]) -> Optional[str]:
+    """Create ``keys`` on ``coll`` if missing and return the index name.
 
-def load_contents(db, query: Dict[str, Any] | None = None, partition_size: int = 1000) -> dd.DataFrame:
+    Returns None (and logs a warning) when the index cannot be created, e.g.
+    because the batch user lacks the ``createIndex`` privilege.
+    """
+    try:
+        return coll.create_index(keys)
+    except PyMongoError as e:
+        logger.warning(f"Could not ensure index {keys} on '{coll.name}': {e}")
+        return None
+
+
+def _id_ranges(
+    coll,
+    query: Dict[str, Any],
+    num_partitions: int,
+    hint: Optional[str] = None,
+) -> List[tuple]:
+    """Split the ``_id`` key space of the matching documents into ``num_partitions``
+    half-open ranges holding roughly the same number of documents.
+
+    Boundaries come from a ``$bucketAuto`` over ``_id``, which only reads the
+    keys, so skewed insert times or non-ObjectId keys still give balanced
+    partitions. ``None`` means the range is unbounded on that side. ``hint``
+    names an index covering ``query`` and ``_id``.
+    """
+    if num_partitions <= 1:
+        return [(None, None)]
+    pipeline = [
+        {'$match': query},
+        {'$project': {'_id': 1}},
+        {'$bucketAuto': {'groupBy': '$_id', 'buckets': num_partitions}},
+    ]
+    hint_kwargs = {'hint': hint} if hint else {}
+    buckets = list(coll.aggregate(pipeline, allowDiskUse=True, **hint_kwargs))
+    bounds = [bucket['_id']['min'] for bucket in buckets[1:]]
+    edges = [None] + bounds + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _load_id_range(
+    coll,
+    query: Dict[str, Any],
+    id_lo: Any,
+    id_hi: Any,
+    fields: Iterable[str],
+    dtypes: Dict[str, Any],
+    computed_fields: Dict[str, Any],
+    batch_size: int,
+) -> pd.DataFrame:
+    """Read one ``_id`` range of a collection into a Pandas DataFrame.
+
+    The range is read with an aggregation whose ``$project`` both trims the
+    documents to ``fields`` and evaluates ``computed_fields`` on the server.
+    """
+    id_filter: Dict[str, Any] = {}
+    if id_lo is not None:
+        id_filter['$gte'] = id_lo
+    if id_hi is not None:
+        id_filter['$lt'] = id_hi
+    range_query = {'$and': [query, {'_id': id_filter}]} if id_filter else query
+    projection = {**{field: 1 for field in fields}, **computed_fields}
+    pipeline = [{'$match': range_query}, {'$project': projection}]
+    cursor = coll.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+    return _documents_to_frame(cursor, columns=['id', *fields], dtypes=dtypes)
+
+
+def _load_collection(
+    coll,
+    query: Dict[str, Any],
+    fields: Iterable[str],
+    dtypes: Dict[str, Any],
+    computed_fields: Dict[str, Any],
+    partition_size: int,
+    batch_size: int | None,
+    hint: Optional[str] = None,
+) -> dd.DataFrame:
+    """Build a lazy Dask DataFrame whose partitions each read one ``_id`` range.
+
+    Without an explicit ``batch_size`` each range is requested in a single
+    batch (with headroom for uneven ``$bucketAuto`` ranges), so a partition
+    normally arrives in the aggregate's first reply without any ``getMore``.
+    ``hint`` is only applied to the count and the boundary computation; the
+    per-range reads are left to the query planner, since forcing a filter
+    index there would rescan the whole filter range for every partition.
+    """
+    batch_size = batch_size or 2 * partition_size
+    hint_kwargs = {'hint': hint} if hint else {}
+    total = coll.count_documents(query, **hint_kwargs)
+    num_partitions = _partitions_for_count(total, partition_size)
+    ranges = _id_ranges(coll, query, num_partitions, hint)
+    logger.info(f"Reading {total} documents from '{coll.name}' in {len(ranges)} partitions.")
+
+    meta = _documents_to_frame([], columns=['id', *fields], dtypes=dtypes)
+    parts = [
+        dask.delayed(_load_id_range)(coll, query, lo, hi, fields, dtypes, computed_fields, batch_size)
+        for lo, hi in ranges
+    ]
+    with dask.config.set(_NO_STRING_CONVERSION):
+        return dd.from_delayed(parts, meta=meta, verify_meta=False)
+
+
+def load_contents(
+    db,
+    query: Dict[str, Any] | None = None,
+    partition_size: int = 1000,
+    batch_size: int | None = None,
+    fields: Iterable[str] | None = None,
+) -> dd.DataFrame:
     """Load content data from MongoDB 'curation' collection into a Dask DataFrame.
 
-    This implementation streams data directly from the MongoDB cursor without
-    materialising the entire result set in memory. The optional ``query``
-    parameter allows callers to limit the data fetched from MongoDB.
+    The collection is split into ``_id`` ranges of at most roughly
+    ``partition_size`` documents (smaller when that gives every CPU a few
+    ranges) and each range is read by its own Dask task, so partitions are
+    fetched in parallel and only materialised when computed. The optional
+    ``query`` parameter allows callers to limit the data fetched from MongoDB.
+    ``batch_size`` overrides the number of documents per round trip, which by
+    default covers a whole partition (the server still caps a batch at 16 MiB).
+    Only ``fields`` (default ``CURATION_FIELDS``) plus the computed ``id`` are
+    transferred from the server.
     """
-    logger.info("Loading contents from MongoDB 'curation' collection via streaming cursor...")
-    start_time = pd.Timestamp.now()
+    logger.info("Loading contents from MongoDB 'curation' collection via partitioned cursors...")
+    start_time = time.perf_counter()
     try:
         curation_coll = db['curation']
-        contents_cursor = curation_coll.find(query or {}, batch_size=partition_size)
-
-        def _prepare(doc: Dict[str, Any]) -> Dict[str, Any]:
-            doc = dict(doc)
-            doc['id'] = str(doc.get('_id'))
-            return doc
-
-        bag = dbag.from_sequence(contents_cursor, partition_size=partition_size).map(_prepare)
-        ddf = bag.to_dataframe()
-        duration = (pd.Timestamp.now() - start_time).total_seconds()
+        ddf = _load_collection(
+            curation_coll, query or {}, tuple(fields or CURATION_FIELDS), CURATION_DTYPES,
+            CURATION_COMPUTED_FIELDS, partition_size, batch_size,
+        )
+        duration = time.perf_counter() - start_time
         logger.info(f"Created Dask DataFrame for contents in {duration:.2f} seconds.")
         return ddf
     except Exception as e:
@@ -108,31 +364,32 @@ def load_users(
     db,
     last_login_after: datetime | None = None,
     partition_size: int = 1000,
+    batch_size: int | None = None,
+    fields: Iterable[str] | None = None,
 ) -> dd.DataFrame:
     """Load user data from MongoDB 'user' collection into a Dask DataFrame.
 
-    The function streams user documents in chunks. If ``last_login_after`` is
-    provided, only users whose ``last_login_dt`` is greater than or equal to the
-    given datetime are fetched.
+    Users are read in ``_id`` range partitions like ``load_contents``. If
+    ``last_login_after`` is provided, only users whose ``last_login_dt`` is
+    greater than or equal to the given datetime are fetched, counted and
+    partitioned through ``USER_LOGIN_INDEX`` (created if missing). ``batch_size``
+    overrides the per-partition batch size and ``fields`` (default
+    ``USER_FIELDS``) the projected fields.
     """
-    logger.info("Loading users from MongoDB 'user' collection via streaming cursor...")
-    start_time = pd.Timestamp.now()
+    logger.info("Loading users from MongoDB 'user' collection via partitioned cursors...")
+    start_time = time.perf_counter()
     try:
         user_coll = db['user']
         query: Dict[str, Any] = {}
+        hint = None
         if last_login_after is not None:
             query['last_login_dt'] = {'$gte': last_login_after}
-        users_cursor = user_coll.find(query, batch_size=partition_size)
-
-        def _prepare(user: Dict[str, Any]) -> Dict[str, Any]:
-            user = dict(user)
-            user['id'] = str(user.get('_id'))
-            user.setdefault('owned_stocks', [])
-            return user
-
-        bag = dbag.from_sequence(users_cursor, partition_size=partition_size).map(_prepare)
-        ddf = bag.to_dataframe()
-        duration = (pd.Timestamp.now() - start_time).total_seconds()
+            hint = _ensure_index(user_coll, USER_LOGIN_INDEX)
+        ddf = _load_collection(
+            user_coll, query, tuple(fields or USER_FIELDS), USER_DTYPES,
+            USER_COMPUTED_FIELDS, partition_size, batch_size, hint,
+        )
+        duration = time.perf_counter() - start_time
         logger.info(f"Created Dask DataFrame for users in {duration:.2f} seconds.")
         return ddf
     except Exception as e:
@@ -140,20 +397,30 @@ def load_users(
         raise
 
 
-def load_user_port(db) -> dd.DataFrame:
-    """Load user portfolio information from MongoDB 'user_port' collection."""
+def load_user_port(
+    db,
+    batch_size: int = 0,
+    fields: Iterable[str] | None = None,
+) -> dd.DataFrame:
+    """Load user portfolio information from MongoDB 'user_port' collection.
+
+    The cursor is streamed straight into column lists in ``batch_size``
+    batches (0, the default, lets the server fill each 16 MiB reply), so the
+    raw documents are never held as one list. If ``fields`` is given only
+    those fields are projected; otherwise whole documents are read.
+    """
     logger.info("Loading user portfolio data from MongoDB 'user_port' collection...")
-    start_time = pd.Timestamp.now()
+    start_time = time.perf_counter()
     try:
         port_coll = db['user_port']
-        ports_cursor = port_coll.find()
-        ports_list = list(ports_cursor)
-        ports_pd = pd.DataFrame(ports_list)
+        projection = {field: 1 for field in fields} if fields else None
+        ports_cursor = port_coll.find(projection=projection, batch_size=batch_size)
+        ports_pd = _documents_to_frame(ports_cursor)
         mem_usage = ports_pd.memory_usage(deep=True).sum() / (1024**2)
         logger.info(f"Loaded {len(ports_pd)} portfolio records into Pandas DataFrame ({mem_usage:.2f} MB). Converting to Dask DataFrame.")
-        duration = (pd.Timestamp.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         logger.info(f"User portfolio loading took {duration:.2f} seconds.")
-        return dd.from_pandas(ports_pd, npartitions=1)
+        return _frame_to_dask(ports_pd, npartitions=_partitions_for_size(mem_usage))
     except Exception as e:
         logger.error(f"Error loading user portfolio data: {e}", exc_info=True)
         raise
@@ -161,30 +428,28 @@ def load_user_port(db) -> dd.DataFrame:
 
 # Result validation
 
-def validate_candidate_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Validate and clean candidate result data."""
-    if not isinstance(results, list):
-        raise DataIntegrityError(f"Results must be a list, got {type(results)}")
+def _iter_valid_candidate_results(results: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    """Yield cleaned candidate results one at a time, skipping invalid ones.
 
-    validated_results = []
-    invalid_count = 0
+    The summary warning for skipped results is logged once the input is exhausted.
+    """
+    # Invalid results are only counted here and reported in one summary line,
+    # so a bad batch does not emit one log record per result.
+    bad_type = bad_cust = bad_curation = no_valid_curation = 0
 
-    for i, result in enumerate(results):
+    for result in results:
         if not isinstance(result, dict):
-            logger.warning(f"Result {i} is not a dictionary: {type(result)}")
-            invalid_count += 1
+            bad_type += 1
             continue
 
         cust_no = result.get('cust_no')
         if not cust_no or not isinstance(cust_no, str):
-            logger.warning(f"Result {i} has invalid cust_no: {cust_no}")
-            invalid_count += 1
+            bad_cust += 1
             continue
 
         curation_list = result.get('curation_list', [])
         if not isinstance(curation_list, list):
-            logger.warning(f"Result {i} has invalid curation_list: {type(curation_list)}")
-            invalid_count += 1
+            bad_curation += 1
             continue
 
         valid_curations = []
@@ -203,11 +468,202 @@ def validate_candidate_results(results: List[Dict[str, Any]]) -> List[Dict[str,
                 continue
 
         if valid_curations:
-            validated_results.append({'cust_no': cust_no, 'curation_list': valid_curations})
+            yield {'cust_no': cust_no, 'curation_list': valid_curations}
         else:
-            invalid_count += 1
+            no_valid_curation += 1
 
+    invalid_count = bad_type + bad_cust + bad_curation + no_valid_curation
     if invalid_count > 0:
-        logger.warning(f"Filtered out {invalid_count} invalid results")
+        logger.warning(
+            f"Filtered out {invalid_count} invalid results (not a dict: {bad_type}, "
+            f"invalid cust_no: {bad_cust}, invalid curation_list: {bad_curation}, "
+            f"no valid curations: {no_valid_curation})"
+        )
+
+
+def validate_candidate_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Validate and clean candidate result data."""
+    if not isinstance(results, list):
+        raise DataIntegrityError(f"Results must be a list, got {type(results)}")
+    return list(_iter_valid_candidate_results(results))
+
+
+# Result saving
+
+SAVE_BATCH_SIZE = 1000
+SAVE_MAX_RETRIES = 3
+SAVE_BACKOFF_BASE = 0.1
+SAVE_BACKOFF_MIN = 0.05
+SAVE_BACKOFF_CAP = 5.0
+# Write errors that fail the same way on every attempt (duplicate key).
+NON_RETRIABLE_WRITE_ERRORS = frozenset({11000})
+
+
+def _iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Yield lists of at most ``batch_size`` items without materialising ``items``."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _candidate_update_ops(results: Iterable[Dict[str, Any]], now: datetime) -> Iterator[UpdateOne]:
+    """Generate one upsert per customer for the candidate collection.
 
-    return validated_results
+    The constant ``$setOnInsert`` document is built once and shared by every
+    operation; only the per-customer ``$set`` payload is created per row.
+    """
+    set_on_insert = {'create_dt': now}
+    for result in results:
+        yield UpdateOne(
+            {'cust_no': result['cust_no']},
+            {
+                '$set': {'curation_list': result['curation_list'], 'modi_dt': now},
+                '$setOnInsert': set_on_insert,
+            },
+            upsert=True,
+        )
+
+
+def _save_results_to_file(results: List[Dict[str, Any]]) -> str:
+    """Dump results to a timestamped JSON file so they can be restored later.
+
+    The file goes to ``batch.fallback_dir`` (default: the working directory)
+    rather than the system temp dir, which is often tmpfs or cleared on
+    restart. Returns the absolute path of the written file.
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    fallback_dir = os.path.abspath(BATCH_FALLBACK_DIR)
+    os.makedirs(fallback_dir, exist_ok=True)
+    path = os.path.join(fallback_dir, f"candidate_results_{timestamp}.json")
+    payload = orjson.dumps(
+        results,
+        default=str,
+        option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY,
+    )
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return path
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Jittered exponential backoff so concurrent writers do not retry in phase."""
+    return random.uniform(SAVE_BACKOFF_MIN, min(SAVE_BACKOFF_CAP, SAVE_BACKOFF_BASE * 2 ** attempt))
+
+
+def _bulk_write_with_retry(collection, batch: List[UpdateOne], max_retries: int) -> tuple:
+    """Run one unordered ``bulk_write`` batch, retrying with jittered backoff.
+
+    When only some operations fail (``BulkWriteError`` with ``writeErrors``)
+    the successful ones are counted and only the failed subset is re-sent on
+    the next attempt. When the error carries only ``writeConcernErrors`` the
+    whole batch is re-sent, so that attempt's counts are discarded. Errors
+    that cannot succeed on retry (e.g. duplicate key) are raised immediately.
+
+    Returns:
+        ``(matched_count, upserted_count)`` with every operation counted once.
+    """
+    matched_count = 0
+    upserted_count = 0
+    pending = batch
+    for attempt in range(max_retries):
+        try:
+            result = collection.bulk_write(pending, ordered=False, bypass_document_validation=True)
+            return matched_count + result.matched_count, upserted_count + result.upserted_count
+        except BulkWriteError as e:
+            details = e.details
+            write_errors = details.get('writeErrors', [])
+            if any(error.get('code') in NON_RETRIABLE_WRITE_ERRORS for error in write_errors):
+                raise
+            failed_indices = sorted({error['index'] for error in write_errors})
+            if failed_indices:
+                # Operations that succeeded are not re-sent, so count them now.
+                matched_count += details.get('nMatched', 0)
+                upserted_count += details.get('nUpserted', 0)
+                pending = [pending[i] for i in failed_indices]
+            error = e
+        except PyMongoError as e:
+            error = e
+        if attempt == max_retries - 1:
+            raise error
+        wait = _backoff_delay(attempt)
+        logger.warning(
+            f"Bulk write of {len(pending)} operations failed "
+            f"(attempt {attempt + 1}/{max_retries}), retrying in {wait:.2f}s: {error}"
+        )
+        time.sleep(wait)
+
+
+def save_results(
+    results: List[Dict[str, Any]],
+    db,
+    collection_name: str = "user_candidate",
+    batch_size: int = SAVE_BATCH_SIZE,
+    max_retries: int = SAVE_MAX_RETRIES,
+    timestamp: Optional[datetime] = None,
+) -> bool:
+    """Upsert candidate results into MongoDB.
+
+    Results are validated while the upserts are generated, in a single pass
+    without an intermediate list, and written as unordered ``bulk_write``
+    batches of ``batch_size`` upserts keyed on ``cust_no``, so memory stays bounded no
+    matter how many users were processed. A failing batch is retried with
+    jittered exponential backoff, re-sending only the operations that failed; if it
+    still fails, all validated
+    results are written to a fallback JSON file instead (the upserts are
+    idempotent, so replaying the file is safe).
+
+    ``timestamp`` is written as ``modi_dt`` (and ``create_dt`` on insert) for
+    every document; pass the batch-wide timestamp so all results of one run
+    share it. Defaults to the time of the call.
+
+    Returns:
+        True if every batch was written to MongoDB, False if the results
+        were only saved to the fallback file.
+
+    Raises:
+        DataIntegrityError: If ``results`` is not a list.
+        MongoDBError: If neither MongoDB nor the fallback file could be written.
+    """
+    if not isinstance(results, list):
+        raise DataIntegrityError(f"Results must be a list, got {type(results)}")
+
+    logger.info(f"Saving {len(results)} results to '{collection_name}'...")
+    start_time = time.perf_counter()
+    target_collection = db[collection_name]
+    now = timestamp or datetime.now()
+    saved_count = 0
+    matched_count = 0
+    upserted_count = 0
+
+    try:
+        operations = _candidate_update_ops(_iter_valid_candidate_results(results), now)
+        for batch in _iter_batches(operations, batch_size):
+            matched, upserted = _bulk_write_with_retry(target_collection, batch, max_retries)
+            saved_count += len(batch)
+            matched_count += matched
+            upserted_count += upserted
+    except PyMongoError as e:
+        logger.error(f"Failed to save results to MongoDB: {e}")
+        try:
+            # Rare path: validate again to rebuild the full list for the file.
+            path = _save_results_to_file(validate_candidate_results(results))
+        except OSError as file_error:
+            raise MongoDBError(
+                f"Failed to save results to MongoDB ({e}) and fallback file ({file_error})"
+            )
+        logger.warning(f"Results saved to fallback file: {path}")
+        return False
+
+    if saved_count == 0:
+        logger.warning("No valid candidate results to save.")
+        return True
+
+    duration = time.perf_counter() - start_time
+    logger.info(
+        f"Saved {saved_count} results in {duration:.2f} seconds "
+        f"(matched: {matched_count}, upserted: {upserted_count})."
+    )
+    return True
@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 
 CONFIG_PATH = Path(__file__).resolve().parent.parent / "configs" / "config.yaml"
 
+# Prefer the libyaml C parser; PyYAML builds without libyaml only have the pure-Python one.
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_config() -> Dict[str, Any]:
     """Load YAML configuration file."""
@@ -15,7 +18,7 @@ def load_config() -> Dict[str, Any]:
         raise FileNotFoundError(f"Config file not found at {CONFIG_PATH}")
     try:
         with open(CONFIG_PATH, "r") as f:
-            config = yaml.safe_load(f) or {}
+            config = yaml.load(f, Loader=_YamlLoader) or {}
             logger.info(f"Config file loaded successfully from {CONFIG_PATH}")
             return config
     except Exception as e:
@@ -1,4 +1,8 @@
+import asyncio
+import functools
 import logging
+import os
+import threading
 from typing import Optional
 
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -22,8 +26,52 @@ mongo_db = None
 os_client: Optional[OpenSearch] = None
 oracle_pool = None
 
+# Serialises creation/teardown of the sync clients so concurrent first calls
+# (e.g. from Dask worker threads) share one client instead of leaking extras.
+_sync_client_lock = threading.RLock()
+
+
+def _synchronized(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _sync_client_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
 
 # ===== MongoDB =====
+# Defaults for sync clients. Wire compression pays off on the large collection
+# scans in the batch loaders; compressors whose Python package is missing are
+# skipped by pymongo with a warning. Pool sizing can be tuned in config.yaml
+# (``mongodb.max_pool_size`` etc.), and keys set under ``mongodb.options`` are
+# already part of the URI and take precedence over everything here.
+MONGO_CLIENT_DEFAULTS = {
+    "serverSelectionTimeoutMS": 5000,
+    "connectTimeoutMS": 10000,
+    "socketTimeoutMS": 60000,
+    "retryWrites": True,
+    "compressors": "zstd,snappy,zlib",
+    "zlibCompressionLevel": 6,
+}
+MONGO_POOL_SETTINGS = {
+    # config key: (MongoClient option, default)
+    "max_pool_size": ("maxPoolSize", 100),
+    "min_pool_size": ("minPoolSize", 10),
+    "max_connecting": ("maxConnecting", 8),
+    "max_idle_time_ms": ("maxIdleTimeMS", 60000),
+    "wait_queue_timeout_ms": ("waitQueueTimeoutMS", 5000),
+}
+
+
+def mongo_client_options() -> dict:
+    """Keyword arguments for a sync ``MongoClient`` built from config.yaml."""
+    options = dict(MONGO_CLIENT_DEFAULTS)
+    for config_key, (option, default) in MONGO_POOL_SETTINGS.items():
+        options[option] = MONGO_CONFIG.get(config_key, default)
+    uri_options = MONGO_CONFIG.get("options") or {}
+    return {k: v for k, v in options.items() if k not in uri_options}
+
+
 async def connect_to_mongo():
     """Connect to MongoDB asynchronously."""
     global async_mongo_client, async_mongo_db
@@ -38,18 +86,22 @@ async def connect_to_mongo():
     logger.info("MongoDB connected and ping successful.")
 
 
+@_synchronized
 def connect_mongo():
     """Connect to MongoDB synchronously."""
     global mongo_client, mongo_db
-    if mongo_db:
+    if mongo_db is not None:
         return mongo_db
     logger.info("Connecting to MongoDB (sync)...")
     uri = MONGO_CONFIG.get("uri")
     db_name = MONGO_CONFIG.get("db_name")
-    mongo_client = MongoClient(uri, serverSelectionTimeoutMS=5000, connectTimeoutMS=10000, socketTimeoutMS=30000, maxPoolSize=10, retryWrites=True)
+    client_options = mongo_client_options()
+    mongo_client = MongoClient(uri, **client_options)
     mongo_client.admin.command("ping")
     mongo_db = mongo_client[db_name]
-    logger.info("MongoDB connected successfully.")
+    uri_options = MONGO_CONFIG.get("options") or {}
+    compressors = uri_options.get("compressors", client_options.get("compressors"))
+    logger.info(f"MongoDB connected successfully (compressors: {compressors or 'none'}).")
     return mongo_db
 
 
@@ -71,6 +123,7 @@ async def close_mongo_connection():
         logger.info("MongoDB async connection closed.")
 
 
+@_synchronized
 def close_mongo():
     global mongo_client, mongo_db
     if mongo_client:
@@ -96,6 +149,8 @@ async def connect_to_opensearch():
         "ssl_assert_hostname": False,
         "ssl_show_warn": False,
         "connections_per_node": 100,
+        # gzip request/response bodies; search hits are large, repetitive JSON
+        "http_compress": OPENSEARCH_CONFIG.get("http_compress", True),
         "connection_class": AsyncHttpConnection,
     }
     if http_auth_config:
@@ -113,10 +168,11 @@ async def connect_to_opensearch():
         logger.info("OpenSearch async connected and ping successful.")
 
 
+@_synchronized
 def connect_opensearch():
     """Connect to OpenSearch synchronously."""
     global os_client
-    if os_client:
+    if os_client is not None:
         return os_client
     logger.info("Connecting to OpenSearch (sync)...")
     hosts = OPENSEARCH_CONFIG.get("hosts")
@@ -127,6 +183,9 @@ def connect_opensearch():
         "verify_certs": False,
         "ssl_assert_hostname": False,
         "ssl_show_warn": False,
+        # Batch jobs query several indexes concurrently over this one client
+        "pool_maxsize": OPENSEARCH_CONFIG.get("pool_maxsize", 32),
+        "http_compress": OPENSEARCH_CONFIG.get("http_compress", True),
         "connection_class": RequestsHttpConnection,
     }
     if http_auth_config:
@@ -162,6 +221,7 @@ async def close_opensearch_connection():
         logger.info("OpenSearch async connection closed.")
 
 
+@_synchronized
 def close_opensearch():
     global os_client
     if os_client is not None:
@@ -170,6 +230,10 @@ def close_opensearch():
 
 
 # ===== Oracle DB =====
+# Pool size used when oracledb.pool_max is not configured.
+ORACLE_DEFAULT_POOL_MAX = (os.cpu_count() or 1) * 4
+
+
 async def connect_to_oracle():
     """Create Oracle async connection pool."""
     global async_oracle_pool
@@ -180,8 +244,8 @@ async def connect_to_oracle():
     password = ORACLE_CONFIG.get("password")
     dsn = ORACLE_CONFIG.get("dsn")
     encoding = ORACLE_CONFIG.get("encoding", "UTF-8")
-    pool_min = ORACLE_CONFIG.get("pool_min", 1)
-    pool_max = ORACLE_CONFIG.get("pool_max", 4)
+    pool_max = ORACLE_CONFIG.get("pool_max", ORACLE_DEFAULT_POOL_MAX)
+    pool_min = ORACLE_CONFIG.get("pool_min", max(1, pool_max // 4))
     pool_increment = ORACLE_CONFIG.get("pool_increment", 1)
     pool_timeout = ORACLE_CONFIG.get("pool_timeout", 60)
     async_oracle_pool = await oracledb.create_pool_async(
@@ -195,27 +259,46 @@ async def connect_to_oracle():
         timeout=pool_timeout,
         encoding=encoding,
     )
-    async with async_oracle_pool.acquire() as conn:
-        async with conn.cursor() as cursor:
-            await cursor.execute("SELECT 1 FROM DUAL")
-            await cursor.fetchone()
-    logger.info("Oracle async pool created successfully.")
 
+    async def _check_connection():
+        async with async_oracle_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT 1 FROM DUAL")
+                await cursor.fetchone()
+
+    # Hold pool_min connections at once so they are all open before the first request burst
+    await asyncio.gather(*(_check_connection() for _ in range(pool_min)))
+    logger.info(f"Oracle async pool created successfully ({pool_min} connections warmed).")
+
+
+ORACLE_FETCH_ARRAYSIZE = 10000
+ORACLE_STMT_CACHE_SIZE = 50
 
+
+@_synchronized
 def connect_oracle():
-    """Create Oracle sync connection pool."""
+    """Create Oracle sync connection pool.
+
+    The pool opens the configured ``pool_min`` connections up front and grows
+    towards ``pool_max`` on demand, so a batch that only issues a few queries
+    does not hold dozens of idle sessions. Connections use a larger statement
+    cache, and cursors fetch rows in large round trips for bulk reads.
+    """
     global oracle_pool
-    if oracle_pool:
+    if oracle_pool is not None:
         return oracle_pool
     logger.info("Connecting to Oracle DB (sync)...")
     user = ORACLE_CONFIG.get("user")
     password = ORACLE_CONFIG.get("password")
     dsn = ORACLE_CONFIG.get("dsn")
     encoding = ORACLE_CONFIG.get("encoding", "UTF-8")
-    pool_min = ORACLE_CONFIG.get("pool_min", 1)
-    pool_max = ORACLE_CONFIG.get("pool_max", 4)
+    pool_max = ORACLE_CONFIG.get("pool_max", ORACLE_DEFAULT_POOL_MAX)
+    pool_min = ORACLE_CONFIG.get("pool_min", max(1, pool_max // 4))
     pool_increment = ORACLE_CONFIG.get("pool_increment", 1)
     pool_timeout = ORACLE_CONFIG.get("pool_timeout", 60)
+    oracledb.defaults.arraysize = ORACLE_FETCH_ARRAYSIZE
+    # one extra prefetched row lets a fully fetched result set end without another round trip
+    oracledb.defaults.prefetchrows = ORACLE_FETCH_ARRAYSIZE + 1
     oracle_pool = oracledb.create_pool(
         user=user,
         password=password,
@@ -226,12 +309,13 @@ def connect_oracle():
         getmode=oracledb.POOL_GETMODE_WAIT,
         timeout=pool_timeout,
         encoding=encoding,
+        stmtcachesize=ORACLE_STMT_CACHE_SIZE,
     )
     with oracle_pool.acquire() as conn:
         with conn.cursor() as cursor:
             cursor.execute("SELECT 1 FROM DUAL")
             cursor.fetchone()
-    logger.info("Oracle sync pool created successfully.")
+    logger.info(f"Oracle sync pool created successfully ({pool_min} connections opened).")
     return oracle_pool
 
 
@@ -252,6 +336,7 @@ async def close_oracle_connection():
         logger.info("Oracle async pool closed.")
 
 
+@_synchronized
 def close_oracle():
     global oracle_pool
     if oracle_pool:
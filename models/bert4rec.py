@@ -1,7 +1,9 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, TensorDataset
 import numpy as np
-from typing import Any, List
+from typing import Any, Iterable, List, Union
 from models.base_model import BaseModel
 
 class TransformerEncoder(nn.Module):
@@ -9,7 +11,10 @@ class TransformerEncoder(nn.Module):
         super(TransformerEncoder, self).__init__()
         self.embedding_dim = embedding_dim
         self.position_embedding = nn.Embedding(max_seq_length, embedding_dim)
-        encoder_layer = nn.TransformerEncoderLayer(d_model=embedding_dim, nhead=num_heads)
+        # 위치 인덱스는 고정이므로 한 번만 만들어 재사용 (state_dict에는 저장하지 않음)
+        self.register_buffer('pos_ids', torch.arange(max_seq_length).unsqueeze(0), persistent=False)
+        # batch_first 레이아웃: 어텐션이 permute 없이 F.scaled_dot_product_attention(Flash/메모리 효율 커널)으로 바로 전달됨
+        encoder_layer = nn.TransformerEncoderLayer(d_model=embedding_dim, nhead=num_heads, batch_first=True)
         self.transformer_encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
         # 출력층은 다음 임베딩 예측을 위해 구성
         self.output_layer = nn.Linear(embedding_dim, embedding_dim)
@@ -18,16 +23,12 @@ class TransformerEncoder(nn.Module):
         """
         input_seq: (batch_size, seq_length, embedding_dim)
         """
-        batch_size, seq_length, _ = input_seq.size()
-        positions = torch.arange(seq_length, device=input_seq.device).unsqueeze(0).expand(batch_size, seq_length)
-        pos_embed = self.position_embedding(positions)
-        # 입력 임베딩에 위치 임베딩 추가
+        seq_length = input_seq.size(1)
+        pos_embed = self.position_embedding(self.pos_ids[:, :seq_length])  # (1, seq_length, embedding_dim)
+        # 입력 임베딩에 위치 임베딩 추가 (배치 차원은 브로드캐스팅)
         embeddings = input_seq + pos_embed
 
-        # Transformer는 (seq_length, batch_size, embedding_dim) 형식을 요구
-        embeddings = embeddings.permute(1, 0, 2)
-        transformer_out = self.transformer_encoder(embeddings)
-        transformer_out = transformer_out.permute(1, 0, 2)  # (batch_size, seq_length, embedding_dim)
+        transformer_out = self.transformer_encoder(embeddings)  # (batch_size, seq_length, embedding_dim)
 
         # 마지막 타임스텝에 대해 예측
         output = self.output_layer(transformer_out[:, -1, :])
@@ -36,46 +37,78 @@ class TransformerEncoder(nn.Module):
 class BERT4RecModel(BaseModel):
     def __init__(self, embedding_dim: int = 64, num_heads: int = 4, num_layers: int = 2, max_seq_length: int = 50):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        if self.device.type == 'cuda':
+            # Ampere 이상 GPU에서 float32 행렬곱/합성곱을 TF32 텐서 코어로 수행
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
         self.max_seq_length = max_seq_length  # 최대 시퀀스 길이 저장
         self.model = TransformerEncoder(embedding_dim, num_heads, num_layers, max_seq_length).to(self.device)
-        self.optimizer = torch.optim.Adam(self.model.parameters(), lr=0.001)
+        # GPU에서는 학습 forward만 torch.compile로 커널 융합 (고정 배치 shape 기준으로 특수화되므로 추론은 self.model 사용).
+        # 파라미터를 공유하므로 저장/로드는 self.model 기준 유지
+        if self.device.type == 'cuda' and hasattr(torch, 'compile'):
+            self.forward_model = torch.compile(self.model, mode='max-autotune', dynamic=False)
+        else:
+            self.forward_model = self.model
+        # CUDA에서는 fused Adam(파라미터 갱신을 단일 커널로), 그 외에는 foreach 구현 사용
+        if self.device.type == 'cuda':
+            self.optimizer = torch.optim.Adam(self.model.parameters(), lr=0.001, fused=True)
+        else:
+            self.optimizer = torch.optim.Adam(self.model.parameters(), lr=0.001, foreach=True)
+        # 이력이 없는 사용자용 0 패딩 시퀀스는 호출마다 새로 만들지 않고 재사용
+        self._zero_seq = torch.zeros((1, max_seq_length, embedding_dim), dtype=torch.float, device=self.device)
         self.criterion = nn.MSELoss()
 
-    def train(self, data: Any) -> None:
+    def train(self, data: Any, batch_size: int = 256) -> None:
         """
         data: {user_id: [embedding1, embedding2, ..., embeddingT], ...}
-        각 사용자 시퀀스를 학습 샘플로 사용.
+        각 사용자 시퀀스를 학습 샘플로 사용하며, batch_size 개씩 묶어 한 번에 학습.
         """
         self.model.train()
         epochs = 5
+        if not data:
+            return
+        # 모든 사용자 시퀀스를 한 번만 왼쪽 패딩하여 (N, max_seq_length, embedding_dim) 배열로 구성
+        padded = pad_sequences_left(data.values(), self.max_seq_length, self.model.embedding_dim)
+        # 컴파일된 모델은 모든 배치를 같은 shape로 유지해야 재컴파일되지 않으므로 마지막 부분 배치는 버림
+        # (매 epoch 섞이므로 버려지는 샘플은 epoch마다 달라짐). 샘플이 batch_size보다 적으면 전체를 한 배치로 사용.
+        # 컴파일하지 않은 경우(CPU)에는 모든 샘플로 학습
+        compiled = self.forward_model is not self.model
+        batch_size = min(batch_size, len(padded))
+        loader = DataLoader(
+            TensorDataset(torch.from_numpy(padded)),
+            batch_size=batch_size,
+            shuffle=True,
+            drop_last=compiled,
+            pin_memory=self.device.type == 'cuda',
+        )
+        # GPU에서는 bfloat16 autocast로 어텐션/행렬곱을 수행 (가중치와 옵티마이저 상태는 float32 유지)
+        use_bf16 = self.device.type == 'cuda' and torch.cuda.is_bf16_supported()
         for epoch in range(epochs):
             total_loss = 0.0
-            for user_id, sequence in data.items():
-                # 시퀀스를 텐서로 변환
-                seq_tensor = torch.tensor(sequence, dtype=torch.float, device=self.device)  # shape: (T, embedding_dim)
-                # 왼쪽 패딩 적용하여 고정 길이로 맞춤
-                padded_seq = pad_sequence_left(seq_tensor, self.max_seq_length)  # shape: (max_seq_length, embedding_dim)
-                # 배치 차원 추가: (1, max_seq_length, embedding_dim)
-                padded_seq = padded_seq.unsqueeze(0)
+            for (batch,) in loader:
+                batch = batch.to(self.device, non_blocking=True)  # shape: (B, max_seq_length, embedding_dim)
 
                 # 예측 목표: 시퀀스의 마지막 아이템(embedding)
-                target = padded_seq[:, -1, :]  # shape: (1, embedding_dim)
+                target = batch[:, -1, :]  # shape: (B, embedding_dim)
                 # 입력 시퀀스: 마지막 아이템을 제외한 시퀀스
-                input_seq = padded_seq[:, :-1, :]  # shape: (1, max_seq_length-1, embedding_dim)
-                
-                self.optimizer.zero_grad()
-                output = self.model(input_seq)  
-                loss = self.criterion(output, target)
+                input_seq = batch[:, :-1, :]  # shape: (B, max_seq_length-1, embedding_dim)
+
+                self.optimizer.zero_grad(set_to_none=True)
+                with torch.autocast(device_type=self.device.type, dtype=torch.bfloat16, enabled=use_bf16):
+                    output = self.forward_model(input_seq)
+                    loss = self.criterion(output.float(), target)
                 loss.backward()
                 self.optimizer.step()
-                
-                total_loss += loss.item()
+
+                # 배치 평균 손실에 배치 크기를 곱해 사용자별 손실 합계로 집계
+                total_loss += loss.item() * batch.size(0)
             print(f"Epoch {epoch+1}, Loss: {total_loss}")
 
-    def predict(self, user_id: str, candidate_embeddings: List[np.ndarray]) -> List[float]:
+    def predict(self, user_id: str, candidate_embeddings: Union[List[np.ndarray], torch.Tensor]) -> List[float]:
         """
         주어진 user_id에 대해 후보 콘텐츠 임베딩들의 유사도를 예측하여 점수 리스트 반환.
-        candidate_embeddings: 추천 후보 콘텐츠들의 임베딩 리스트
+        candidate_embeddings: 추천 후보 콘텐츠들의 임베딩 리스트,
+            또는 candidate_matrix()로 미리 디바이스에 올려 둔 (N, embedding_dim) 텐서
         """
         self.model.eval()
         
@@ -86,12 +119,11 @@ class BERT4RecModel(BaseModel):
         # 2. 사용자 시퀀스를 텐서로 변환 및 왼쪽 패딩 적용
         if user_sequence_embeddings:
             seq_tensor = torch.tensor(user_sequence_embeddings, dtype=torch.float, device=self.device)
+            padded_seq = pad_sequence_left(seq_tensor, self.max_seq_length)  # (max_seq_length, embedding_dim)
+            padded_seq = padded_seq.unsqueeze(0)  # (1, max_seq_length, embedding_dim)
         else:
-            # 사용자의 이력이 없으면, 임베딩 벡터를 0으로 채움
-            seq_tensor = torch.zeros((1, self.model.embedding_dim), dtype=torch.float, device=self.device)
-        
-        padded_seq = pad_sequence_left(seq_tensor, self.max_seq_length)  # (max_seq_length, embedding_dim)
-        padded_seq = padded_seq.unsqueeze(0)  # (1, max_seq_length, embedding_dim)
+            # 사용자의 이력이 없으면, 미리 만들어 둔 0 시퀀스를 사용
+            padded_seq = self._zero_seq
         
         # 3. 모델을 통한 다음 임베딩 예측
         with torch.no_grad():
@@ -100,15 +132,28 @@ class BERT4RecModel(BaseModel):
             predicted_embedding = self.model(input_seq)  # (1, embedding_dim)
         
         # 4. 예측 임베딩과 각 후보 임베딩 간의 유사도 계산 (코사인 유사도)
+        if len(candidate_embeddings) == 0:
+            return []
+        if isinstance(candidate_embeddings, torch.Tensor):
+            # 후보 행렬이 이미 디바이스에 있으면 예측 벡터를 CPU로 옮기지 않고 한 번의 커널로 계산
+            with torch.no_grad():
+                scores = F.cosine_similarity(predicted_embedding.float(), candidate_embeddings, dim=1)
+            return scores.cpu().tolist()
         predicted_vec = predicted_embedding.cpu().numpy()[0]
-        scores = []
-        for emb in candidate_embeddings:
-            norm_pred = np.linalg.norm(predicted_vec) + 1e-8
-            norm_emb = np.linalg.norm(emb) + 1e-8
-            similarity = np.dot(predicted_vec, emb) / (norm_pred * norm_emb)
-            scores.append(similarity)
-        
-        return scores
+        # 후보 임베딩을 (N, D) 행렬로 쌓아 한 번의 행렬-벡터 곱으로 계산 (예측 벡터 norm은 한 번만 계산)
+        candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+        norm_pred = np.sqrt(np.vdot(predicted_vec, predicted_vec)) + 1e-8
+        norm_candidates = np.linalg.norm(candidates, axis=1) + 1e-8
+        scores = (candidates @ predicted_vec) / (norm_pred * norm_candidates)
+
+        return scores.tolist()
+
+    def candidate_matrix(self, candidate_embeddings: List[np.ndarray]) -> torch.Tensor:
+        """
+        후보 임베딩 리스트를 모델 디바이스의 (N, embedding_dim) float 텐서로 한 번 변환.
+        같은 후보 집합으로 여러 사용자를 예측할 때 결과를 캐시해 predict에 전달.
+        """
+        return torch.from_numpy(np.asarray(candidate_embeddings, dtype=np.float32)).to(self.device)
 
     def retrieve_user_sequence(self, user_id: str) -> List[List[float]]:
         """
@@ -126,6 +171,21 @@ class BERT4RecModel(BaseModel):
     def load(self, path: str) -> None:
         self.model.load_state_dict(torch.load(path, map_location=self.device))
 
+def pad_sequences_left(sequences: Iterable[List[Any]], max_seq_length: int, embedding_dim: int) -> np.ndarray:
+    """
+    여러 시퀀스를 왼쪽 패딩하여 하나의 float32 배열로 만듭니다.
+    sequences: 각 원소가 (seq_length, embedding_dim) 형태인 임베딩 시퀀스들
+    반환: (len(sequences), max_seq_length, embedding_dim) 형태의 배열
+    """
+    sequences = list(sequences)
+    padded = np.zeros((len(sequences), max_seq_length, embedding_dim), dtype=np.float32)
+    for i, sequence in enumerate(sequences):
+        # 최대 길이를 넘으면 마지막 max_seq_length 부분만 사용
+        tail = np.asarray(sequence, dtype=np.float32)[-max_seq_length:]
+        if len(tail):
+            padded[i, max_seq_length - len(tail):] = tail
+    return padded
+
 def pad_sequence_left(sequence: torch.Tensor, max_seq_length: int) -> torch.Tensor:
     """
     주어진 시퀀스(tensor)를 왼쪽에 패딩하여 max_seq_length 길이로 만듭니다.
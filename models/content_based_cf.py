@@ -1,27 +1,74 @@
+import json
 import numpy as np
-from typing import List
-from models.data_preparation import embed_content
+from typing import List, Optional, Tuple
+from models.data_preparation import EMBEDDING_DIM, embed_contents
+
+class ContentIndex:
+    """
+    후보 콘텐츠 임베딩을 한 번만 계산해 (N, D) float32 행렬과 행 norm으로 보관하는 인덱스.
+    후보 집합이 바뀌지 않는 동안 재사용하면 요청마다 임베딩을 다시 계산하지 않음.
+    """
+    def __init__(self, content_metas: List[dict]):
+        self.metas = list(content_metas)
+        self.embeddings = embed_contents(self.metas)
+        self.norms = np.linalg.norm(self.embeddings, axis=1)
+
+    def recommend(self, user_profile: np.ndarray, top_k: int = 10) -> List[dict]:
+        """
+        사용자 프로필과의 코사인 유사도를 한 번의 행렬-벡터 곱으로 계산해 상위 top_k 콘텐츠 반환.
+        """
+        if not self.metas or top_k <= 0:
+            return []
+        profile_norm = np.sqrt(np.vdot(user_profile, user_profile))
+        similarities = (self.embeddings @ user_profile) / (profile_norm * self.norms + 1e-8)
+
+        # 유사도를 기준으로 상위 top_k 콘텐츠 선택 (전체 정렬 대신 argpartition 후 top_k만 정렬)
+        if top_k < len(similarities):
+            top_indices = np.argpartition(-similarities, top_k - 1)[:top_k]
+        else:
+            top_indices = np.arange(len(similarities))
+        top_indices = top_indices[np.argsort(-similarities[top_indices], kind='stable')]
+        return [self.metas[i] for i in top_indices]
 
 def compute_user_profile(user_consumed_content_metas: List[dict]) -> np.ndarray:
     """
     주어진 사용자 소비 콘텐츠 메타데이터 리스트로부터 사용자 프로필 벡터 계산.
     """
-    embeddings = [embed_content(meta) for meta in user_consumed_content_metas]
-    if not embeddings:
-        return np.zeros((64,))  # 임베딩 차원에 맞게 초기화
-    return np.mean(embeddings, axis=0)
+    if not user_consumed_content_metas:
+        return np.zeros((EMBEDDING_DIM,))  # 임베딩 차원에 맞게 초기화
+    # (N, EMBEDDING_DIM) 연속 배열 하나에서 평균을 구해 임베딩 리스트 복사를 피함
+    embeddings = embed_contents(user_consumed_content_metas)
+    return embeddings.mean(axis=0)
+
+# 마지막으로 만든 (후보 집합 키, ContentIndex). 같은 후보 집합으로 연속 호출하면 재사용
+_last_index: Optional[Tuple[str, ContentIndex]] = None
+
+def _content_set_key(content_metas: List[dict]) -> str:
+    """
+    후보 콘텐츠 메타데이터 리스트를 순서까지 포함해 비교 가능한 문자열 키로 변환.
+    """
+    return json.dumps(content_metas, sort_keys=True, ensure_ascii=False, default=str)
+
+def get_content_index(candidate_content_metas: List[dict]) -> ContentIndex:
+    """
+    후보 집합이 직전 호출과 같으면 캐시된 ContentIndex를 반환하고, 다르면 새로 만들어 캐시.
+    """
+    global _last_index
+    key = _content_set_key(candidate_content_metas)
+    if _last_index is None or _last_index[0] != key:
+        _last_index = (key, ContentIndex(candidate_content_metas))
+    return _last_index[1]
 
-def recommend_content(user_profile: np.ndarray, candidate_content_metas: List[dict], top_k: int = 10) -> List[dict]:
+def recommend_content(
+    user_profile: np.ndarray,
+    candidate_content_metas: List[dict],
+    top_k: int = 10,
+    index: Optional[ContentIndex] = None,
+) -> List[dict]:
     """
     사용자 프로필과 후보 콘텐츠 메타데이터를 기반으로 유사도 계산 후 top_k 추천.
+    index를 넘기면 그 인덱스를 그대로 사용하고, 없으면 후보 집합 기준으로 캐시된 인덱스를 재사용.
     """
-    similarities = []
-    for meta in candidate_content_metas:
-        emb = embed_content(meta)
-        # 코사인 유사도 계산
-        sim = np.dot(user_profile, emb) / (np.linalg.norm(user_profile) * np.linalg.norm(emb) + 1e-8)
-        similarities.append(sim)
-    
-    # 유사도를 기준으로 상위 top_k 콘텐츠 선택
-    top_indices = np.argsort(similarities)[-top_k:][::-1]
-    return [candidate_content_metas[i] for i in top_indices]
+    if index is None:
+        index = get_content_index(candidate_content_metas)
+    return index.recommend(user_profile, top_k)
@@ -1,14 +1,26 @@
+from collections import defaultdict
 from typing import Any, List, Tuple
 import numpy as np
 
+EMBEDDING_DIM = 64
+
 def embed_content(content_meta: dict) -> np.ndarray:
     """
     콘텐츠 메타데이터를 받아 임베딩 벡터를 반환하는 함수.
     실제로는 pretrained 모델이나 다른 방식으로 임베딩을 추출.
     여기는 단순한 예시로 난수 벡터를 반환.
     """
-    embedding_dim = 64
-    return np.random.rand(embedding_dim)
+    return np.random.rand(EMBEDDING_DIM)
+
+_rng = np.random.default_rng()
+
+def embed_contents(content_metas: List[dict]) -> np.ndarray:
+    """
+    여러 콘텐츠 메타데이터를 한 번에 임베딩하여 (N, EMBEDDING_DIM) float32 배열로 반환.
+    실제 모델로 교체할 때도 배치 단위 추론을 하도록 이 함수를 구현.
+    여기는 단순한 예시로 난수 행렬을 반환.
+    """
+    return _rng.random((len(content_metas), EMBEDDING_DIM), dtype=np.float32)
 
 def fetch_user_interaction_data() -> List[Tuple[str, dict]]:
     """
@@ -29,10 +41,10 @@ def fetch_user_interaction_data() -> List[Tuple[str, dict]]:
 def preprocess_data(raw_data: List[Tuple[str, dict]]) -> dict:
     """
     수집된 원시 데이터를 사용자별 콘텐츠 임베딩 시퀀스로 전처리.
-    반환: {user_id: [embedding1, embedding2, ...], ...}
+    사용자별로 메타데이터를 먼저 모은 뒤 embed_contents로 한 번에 임베딩.
+    반환: {user_id: (T_u, EMBEDDING_DIM) 임베딩 배열, ...}
     """
-    user_sequences = {}
+    user_metas = defaultdict(list)
     for user_id, content_meta in raw_data:
-        embedding = embed_content(content_meta)
-        user_sequences.setdefault(user_id, []).append(embedding)
-    return user_sequences
+        user_metas[user_id].append(content_meta)
+    return {user_id: embed_contents(metas) for user_id, metas in user_metas.items()}
@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pymongo import MongoClient
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import random
@@ -27,6 +28,9 @@ def create_test_data():
     db.user.delete_many({})
     db.curation.delete_many({})
     
+    # 생성 시각은 한 번만 계산해 모든 문서에 재사용
+    now = datetime.now()
+    
     # 테스트 사용자 데이터 생성
     logger.info("Creating test users...")
     users = []
@@ -35,17 +39,17 @@ def create_test_data():
             "cust_no": f"100000{i:03d}",
             "cust_nm": f"테스트사용자{i+1}",
             "cyber_id": f"testuser{i+1}",
-            "last_login_dt": datetime.now() - timedelta(days=random.randint(1, 30)),
+            "last_login_dt": now - timedelta(days=random.randint(1, 30)),
             "concerns": [
                 {"gic_code": "005930", "stk_name": "삼성전자"},
                 {"gic_code": "000660", "stk_name": "SK하이닉스"}
             ],
-            "create_dt": datetime.now(),
-            "modi_dt": datetime.now()
+            "create_dt": now,
+            "modi_dt": now
         }
         users.append(user)
     
-    db.user.insert_many(users)
+    db.user.insert_many(users, ordered=False)
     logger.info(f"Created {len(users)} test users")
     
     # 테스트 큐레이션 데이터 생성
@@ -53,36 +57,47 @@ def create_test_data():
     
     # 주식 종목 코드 리스트
     stock_codes = ["005930", "000660", "035420", "051910", "006400", "035720", "AAPL", "MSFT", "GOOGL", "TSLA"]
-    sectors = ["기술", "금융", "소비재", "에너지", "헬스케어"]
     
-    curations = []
-    for i in range(100):
-        stock_code = random.choice(stock_codes)
-        sector = random.choice(sectors)
-        
-        curation = {
-            "btopic": random.choice(["시장", "기업분석", "투자전략", "경제동향"]),
-            "stopic": random.choice(["주가분석", "실적분석", "시장전망"]),
-            "label": stock_code,
-            "gic_code": f"UBSTLSA_{stock_code}",
-            "krw_currv_sumamt": random.randint(1000000, 100000000),
+    btopics = ["시장", "기업분석", "투자전략", "경제동향"]
+    stopics = ["주가분석", "실적분석", "시장전망"]
+    
+    # 문서별 난수는 numpy로 한 번에 생성 (BSON 인코딩을 위해 tolist()로 파이썬 값으로 변환)
+    num_curations = 100
+    rng = np.random.default_rng()
+    stock_idx = rng.integers(0, len(stock_codes), num_curations).tolist()
+    btopic_idx = rng.integers(0, len(btopics), num_curations).tolist()
+    stopic_idx = rng.integers(0, len(stopics), num_curations).tolist()
+    sumamts = rng.integers(1000000, 100000000, num_curations, endpoint=True).tolist()
+    total_clicks = rng.integers(0, 1000, num_curations, endpoint=True).tolist()
+    recent_clicks = rng.integers(0, 100, num_curations, endpoint=True).tolist()
+    like_counts = rng.integers(0, 5, num_curations, endpoint=True).tolist()
+    live_days = rng.integers(1, 30, num_curations, endpoint=True).tolist()
+    
+    curations = [
+        {
+            "btopic": btopics[btopic_idx[i]],
+            "stopic": stopics[stopic_idx[i]],
+            "label": stock_codes[stock_idx[i]],
+            "gic_code": f"UBSTLSA_{stock_codes[stock_idx[i]]}",
+            "krw_currv_sumamt": sumamts[i],
             "stk_name": f"테스트종목{i%10}",
             "title": f"테스트 큐레이션 제목 {i+1}",
             "result": f"테스트 큐레이션 내용 {i+1}",
             "thumbnail": f"thumb_{i}.jpg",
-            "total_click_cnt": random.randint(0, 1000),
-            "recent_click_cnt": random.randint(0, 100),
-            "liked_users": [f"100000{j:03d}" for j in random.sample(range(10), random.randint(0, 5))],
+            "total_click_cnt": total_clicks[i],
+            "recent_click_cnt": recent_clicks[i],
+            "liked_users": [f"100000{j:03d}" for j in rng.choice(10, like_counts[i], replace=False).tolist()],
             "disliked_users": [],
-            "live_from": datetime.now() - timedelta(days=random.randint(1, 30)),
+            "live_from": now - timedelta(days=live_days[i]),
             "entry_curation": [],
             "ext_lm_yn": "N",
-            "create_dt": datetime.now(),
-            "modi_dt": datetime.now()
+            "create_dt": now,
+            "modi_dt": now
         }
-        curations.append(curation)
+        for i in range(num_curations)
+    ]
     
-    db.curation.insert_many(curations)
+    db.curation.insert_many(curations, ordered=False)
     logger.info(f"Created {len(curations)} test curation content")
     
     logger.info("Test data creation completed!")
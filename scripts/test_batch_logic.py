@@ -8,29 +8,68 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import logging
 from datetime import datetime, timedelta
-import random
+import numpy as np
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 테스트 대상 모듈은 모듈 로드 시 한 번만 임포트 (실패한 그룹은 None 으로 두고 해당 단계만 건너뜀)
+try:
+    from batch.rules.global_rules import GlobalStockTopReturnRule, GlobalTopLikedContentRule
+except ImportError as e:
+    logger.error(f"Failed to import global rules: {e}")
+    GlobalStockTopReturnRule = GlobalTopLikedContentRule = None
+
+try:
+    from batch.rules.local_rules import LocalMarketContentRule, LocalOwnedStockContentRule, LocalSectorContentRule
+except ImportError as e:
+    logger.error(f"Failed to import local rules: {e}")
+    LocalMarketContentRule = LocalOwnedStockContentRule = LocalSectorContentRule = None
+
+try:
+    from batch.pipeline.final_candidate import generate_candidate_for_user
+except ImportError as e:
+    logger.error(f"Failed to import final candidate pipeline: {e}")
+    generate_candidate_for_user = None
+
+# liked_users 에 사용할 더미 사용자 ID 풀 (컨텐츠마다 문자열을 다시 포맷하지 않도록 미리 생성)
+DUMMY_USER_IDS = [f"100000{j:03d}" for j in range(10)]
+
 def test_rules():
     """규칙들을 개별적으로 테스트"""
     
-    # 더미 컨텍스트 생성
-    dummy_contents = []
-    for i in range(50):
-        content = {
+    # 더미 컨텍스트 생성 (필드별 난수는 numpy로 한 번에 생성, 시각은 한 번만 계산)
+    num_contents = 50
+    btopics = ["시장", "기업분석", "투자전략"]
+    labels = ["005930", "000660", "AAPL", "MSFT"]
+    gic_codes = ["005930", "000660", "AAPL"]
+    now = datetime.now()
+    rng = np.random.default_rng(0)
+    btopic_codes = rng.integers(0, len(btopics), num_contents)
+    btopic_idx = btopic_codes.tolist()
+    label_idx = rng.integers(0, len(labels), num_contents).tolist()
+    gic_idx = rng.integers(0, len(gic_codes), num_contents).tolist()
+    like_counts = rng.integers(0, 5, num_contents, endpoint=True).tolist()
+    age_days = rng.integers(1, 30, num_contents, endpoint=True).tolist()
+
+    # 컨텐츠 생성과 동시에 _id 기준 메타 맵을 구성하고, 리스트는 맵의 값에서 얻음
+    content_meta_map = {
+        f"content_{i}": {
             "_id": f"content_{i}",
-            "btopic": random.choice(["시장", "기업분석", "투자전략"]),
+            "btopic": btopics[btopic_idx[i]],
             "stopic": "주가분석",
-            "label": random.choice(["005930", "000660", "AAPL", "MSFT"]),
-            "gic_code": f"UBSTLSA_{random.choice(['005930', '000660', 'AAPL'])}",
+            "label": labels[label_idx[i]],
+            "gic_code": f"UBSTLSA_{gic_codes[gic_idx[i]]}",
             "title": f"테스트 컨텐츠 {i+1}",
-            "liked_users": [f"100000{j:03d}" for j in random.sample(range(10), random.randint(0, 5))],
-            "create_dt": datetime.now() - timedelta(days=random.randint(1, 30))
+            "liked_users": [DUMMY_USER_IDS[j] for j in rng.choice(len(DUMMY_USER_IDS), like_counts[i], replace=False).tolist()],
+            "create_dt": now - timedelta(days=age_days[i])
         }
-        dummy_contents.append(content)
+        for i in range(num_contents)
+    }
+    dummy_contents = list(content_meta_map.values())
+    # 사용자와 무관한 '시장' 컨텐츠 목록은 배치와 동일하게 컨텍스트에 미리 계산 (btopic 코드 배열 마스크)
+    market_content_ids = [f"content_{i}" for i in np.flatnonzero(btopic_codes == btopics.index("시장")).tolist()]
 
     dummy_portfolio = {
         'portfolio_info': [
@@ -42,7 +81,8 @@ def test_rules():
 
     dummy_context = {
         'contents_list': dummy_contents,
-        'content_meta_map': {c['_id']: c for c in dummy_contents},
+        'content_meta_map': content_meta_map,
+        'market_content_ids': market_content_ids,
         'max_candidates_per_user': 100,
         'portfolio_data': dummy_portfolio,
     }
@@ -59,8 +99,9 @@ def test_rules():
     
     logger.info("Testing Global Rules...")
     try:
-        from batch.rules.global_rules import GlobalStockTopReturnRule, GlobalTopLikedContentRule
-        
+        if GlobalStockTopReturnRule is None:
+            raise ImportError("global rules are not available")
+
         # Global Stock Top Return Rule 테스트
         global_stock_rule = GlobalStockTopReturnRule()
         logger.info(f"Testing {global_stock_rule.rule_name}...")
@@ -79,8 +120,9 @@ def test_rules():
     
     logger.info("Testing Local Rules...")
     try:
-        from batch.rules.local_rules import LocalMarketContentRule, LocalOwnedStockContentRule, LocalSectorContentRule
-        
+        if LocalMarketContentRule is None:
+            raise ImportError("local rules are not available")
+
         # Local Market Content Rule 테스트
         market_rule = LocalMarketContentRule()
         logger.info(f"Testing {market_rule.rule_name}...")
@@ -104,8 +146,9 @@ def test_rules():
     
     logger.info("Testing Final Candidate Generation...")
     try:
-        from batch.pipeline.final_candidate import generate_candidate_for_user
-        
+        if generate_candidate_for_user is None:
+            raise ImportError("final candidate pipeline is not available")
+
         # 더미 후보들
         global_candidates = [f"content_{i}" for i in range(0, 10)]
         other_candidates = [f"content_{i}" for i in range(10, 20)]
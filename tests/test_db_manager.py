@@ -0,0 +1,24 @@
+import pandas as pd
+
+from batch.utils.db_manager import CURATION_DTYPES, _documents_to_frame
+
+
+def test_fractional_counter_becomes_missing():
+    docs = [
+        {'total_click_cnt': 3},
+        {'total_click_cnt': 2.5},
+        {'total_click_cnt': 4.0},
+        {'total_click_cnt': 'n/a'},
+        {},
+    ]
+    frame = _documents_to_frame(
+        docs, columns=['total_click_cnt'], dtypes={'total_click_cnt': CURATION_DTYPES['total_click_cnt']}
+    )
+
+    assert str(frame['total_click_cnt'].dtype) == 'int64[pyarrow]'
+    values = frame['total_click_cnt'].tolist()
+    assert values[0] == 3
+    assert pd.isna(values[1])
+    assert values[2] == 4
+    assert pd.isna(values[3])
+    assert pd.isna(values[4])